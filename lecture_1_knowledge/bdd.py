@@ -0,0 +1,311 @@
+import collections
+import copy
+import sys
+
+from logic import *
+
+FALSE = 0
+TRUE = 1
+
+# Level of the two terminal nodes, below every variable
+LEAF = sys.maxsize
+
+
+class BDD():
+    """Manager for reduced ordered binary decision diagram nodes.
+
+    Nodes are integers indexing the `levels`, `lows` and `highs` lists,
+    with 0 and 1 the false and true terminals. A unique table guarantees
+    each (level, low, high) triple exists once, so equal functions are the
+    same node, and if-then-else results are memoized.
+    """
+
+    def __init__(self, order=()):
+        self.order = []
+        self.positions = {}
+        self.levels = [LEAF, LEAF]
+        self.lows = [FALSE, TRUE]
+        self.highs = [FALSE, TRUE]
+        self.unique = {}
+        self.cache = {}
+        self.compiled = {}
+        for name in order:
+            self.add_variable(name)
+
+    def __len__(self):
+        """Returns the number of nodes created, terminals included."""
+        return len(self.levels)
+
+    def add_variable(self, name):
+        """Places a variable below all existing ones, returning its level."""
+        if name not in self.positions:
+            self.positions[name] = len(self.order)
+            self.order.append(name)
+        return self.positions[name]
+
+    def make(self, level, low, high):
+        """Returns the node testing level, reusing an existing one."""
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.levels)
+            self.levels.append(level)
+            self.lows.append(low)
+            self.highs.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, name):
+        """Returns the node for a single variable."""
+        return self.make(self.add_variable(name), FALSE, TRUE)
+
+    def ite(self, f, g, h):
+        """Returns the node for "if f then g else h"."""
+        if f == TRUE or g == h:
+            return g
+        if f == FALSE:
+            return h
+        if g == TRUE and h == FALSE:
+            return f
+        key = (f, g, h)
+        if key in self.cache:
+            return self.cache[key]
+
+        level = min(self.levels[f], self.levels[g], self.levels[h])
+        f0, f1 = self._cofactors(f, level)
+        g0, g1 = self._cofactors(g, level)
+        h0, h1 = self._cofactors(h, level)
+        node = self.make(level, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self.cache[key] = node
+        return node
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def conjoin(self, f, g):
+        return self.ite(f, g, FALSE)
+
+    def disjoin(self, f, g):
+        return self.ite(f, TRUE, g)
+
+    def compile(self, sentence):
+        """Returns the node equivalent to a logical sentence."""
+        if sentence in self.compiled:
+            return self.compiled[sentence]
+
+        if isinstance(sentence, Symbol):
+            node = self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            node = self.negate(self.compile(sentence.operand))
+        elif isinstance(sentence, And):
+            node = TRUE
+            for conjunct in sentence.conjuncts:
+                node = self.conjoin(node, self.compile(conjunct))
+        elif isinstance(sentence, Or):
+            node = FALSE
+            for disjunct in sentence.disjuncts:
+                node = self.disjoin(node, self.compile(disjunct))
+        elif isinstance(sentence, Implication):
+            node = self.ite(self.compile(sentence.antecedent),
+                            self.compile(sentence.consequent), TRUE)
+        elif isinstance(sentence, Biconditional):
+            right = self.compile(sentence.right)
+            node = self.ite(self.compile(sentence.left),
+                            right, self.negate(right))
+        elif isinstance(sentence, Cardinality):
+            node = self._cardinality(sentence)
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        self.compiled[sentence] = node
+        return node
+
+    def restrict(self, f, level, value):
+        """Returns f with the variable at level fixed to value."""
+        memo = {}
+
+        def restrict(f):
+            if self.levels[f] > level:
+                return f
+            if self.levels[f] == level:
+                return self.highs[f] if value else self.lows[f]
+            if f not in memo:
+                memo[f] = self.make(self.levels[f],
+                                    restrict(self.lows[f]),
+                                    restrict(self.highs[f]))
+            return memo[f]
+
+        return restrict(f)
+
+    def implies(self, f, g):
+        """Checks if every assignment satisfying f satisfies g."""
+        memo = {}
+
+        def implies(f, g):
+            if f == FALSE or g == TRUE or f == g:
+                return True
+
+            # Reduced diagrams other than the terminals are satisfiable
+            # and falsifiable
+            if f == TRUE or g == FALSE:
+                return False
+            key = (f, g)
+            if key not in memo:
+                level = min(self.levels[f], self.levels[g])
+                f0, f1 = self._cofactors(f, level)
+                g0, g1 = self._cofactors(g, level)
+                memo[key] = implies(f0, g0) and implies(f1, g1)
+            return memo[key]
+
+        return implies(f, g)
+
+    def count(self, f):
+        """Counts assignments to all manager variables satisfying f."""
+        n = len(self.order)
+        memo = {FALSE: 0, TRUE: 1}
+
+        def level(node):
+            return n if self.levels[node] == LEAF else self.levels[node]
+
+        def count(f):
+            if f not in memo:
+                low, high = self.lows[f], self.highs[f]
+                memo[f] = (
+                    count(low) * 2 ** (level(low) - level(f) - 1)
+                    + count(high) * 2 ** (level(high) - level(f) - 1)
+                )
+            return memo[f]
+
+        return count(f) * 2 ** level(f)
+
+    def size(self, f):
+        """Returns the number of nodes reachable from f."""
+        seen = set()
+        frontier = [f]
+        while frontier:
+            node = frontier.pop()
+            if node not in seen:
+                seen.add(node)
+                if node > TRUE:
+                    frontier.extend([self.lows[node], self.highs[node]])
+        return len(seen)
+
+    def _cofactors(self, f, level):
+        if self.levels[f] == level:
+            return self.lows[f], self.highs[f]
+        return f, f
+
+    def _cardinality(self, sentence):
+        """Builds at-least counters with ite over the operands."""
+        operands = [self.compile(operand) for operand in sentence.operands]
+        n = len(operands)
+        low, high = sentence.low, sentence.high
+        if low > n:
+            return FALSE
+
+        # at_least[j] holds "at least j of the operands seen so far"
+        top = min(n, max(low, high + 1))
+        at_least = [TRUE] + [FALSE] * top
+        for operand in operands:
+            for j in range(top, 0, -1):
+                at_least[j] = self.ite(operand, at_least[j - 1], at_least[j])
+        node = at_least[low]
+        if high < n:
+            node = self.conjoin(node, self.negate(at_least[high + 1]))
+        return node
+
+
+class CompiledKB():
+    """Knowledge base compiled once to a BDD for repeated fast queries.
+
+    Entailment of a literal, model counting and conditioning on a fact run
+    in time linear in the size of the diagram.
+    """
+
+    def __init__(self, knowledge, order="appearance"):
+        self.manager = BDD(variable_order(knowledge, order))
+        self.symbols = knowledge.symbols()
+        self.fixed = {}
+        self.root = self.manager.compile(knowledge)
+
+    def __len__(self):
+        """Returns the number of nodes in the compiled knowledge base."""
+        return self.manager.size(self.root)
+
+    def entails(self, query):
+        """Checks if the knowledge base and the fixed facts entail query."""
+        node = self.manager.compile(query)
+        for name, value in self.fixed.items():
+            node = self.manager.restrict(
+                node, self.manager.positions[name], value
+            )
+        return self.manager.implies(self.root, node)
+
+    def count_models(self):
+        """Counts assignments to the knowledge base symbols not fixed."""
+        free = len(self.symbols - self.fixed.keys())
+        return self.manager.count(self.root) >> (len(self.manager.order) - free)
+
+    def condition(self, literal):
+        """Returns the knowledge base with a symbol or its negation fixed."""
+        value = not isinstance(literal, Not)
+        symbol = literal if value else literal.operand
+        if not isinstance(symbol, Symbol):
+            raise TypeError("can only condition on a symbol or its negation")
+
+        conditioned = copy.copy(self)
+        conditioned.fixed = dict(self.fixed)
+        conditioned.fixed[symbol.name] = value
+        if symbol.name in self.fixed:
+            if self.fixed[symbol.name] != value:
+                conditioned.root = FALSE
+        else:
+            level = self.manager.add_variable(symbol.name)
+            conditioned.root = self.manager.restrict(self.root, level, value)
+        return conditioned
+
+
+def variable_order(sentence, heuristic="appearance"):
+    """Orders the symbols of a sentence for BDD compilation.
+
+    `heuristic` is "appearance" (first occurrence, depth first, which keeps
+    symbols of the same clause together), "frequency" (most occurrences
+    first), "sorted" (by name) or an explicit list of names; symbols it
+    leaves out follow in appearance order.
+    """
+    appearance = []
+    occurrences = collections.Counter()
+    stack = [sentence]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Symbol):
+            if node.name not in occurrences:
+                appearance.append(node.name)
+            occurrences[node.name] += 1
+        else:
+            stack.extend(reversed(node.children()))
+
+    if heuristic == "appearance":
+        return appearance
+    elif heuristic == "frequency":
+        return sorted(appearance, key=lambda name: -occurrences[name])
+    elif heuristic == "sorted":
+        return sorted(appearance)
+    elif isinstance(heuristic, str):
+        raise ValueError(f"unknown variable ordering heuristic {heuristic}")
+    order = list(heuristic)
+    named = set(order)
+    return order + [name for name in appearance if name not in named]
+
+
+def entails(knowledge, query):
+    """Checks if knowledge entails query by compiling both to a BDD."""
+    return CompiledKB(knowledge).entails(query)
+
+
+def entails_many(knowledge, queries):
+    """Checks which queries knowledge entails, compiling it once."""
+    compiled = CompiledKB(knowledge)
+    return [compiled.entails(query) for query in queries]
@@ -0,0 +1,161 @@
+import time
+
+from logic import *
+
+
+def count_nodes(sentence):
+    """Counts the nodes of a sentence tree."""
+    return 1 + sum(count_nodes(child) for child in sentence.children())
+
+
+def assignment(n, cardinality):
+    """Builds the puzzle.py knowledge base for n people and n houses."""
+    grid = [[Symbol(f"p{i}h{j}") for j in range(n)] for i in range(n)]
+    knowledge = And()
+    for i in range(n):
+        if cardinality:
+            knowledge.add(ExactlyOne(*grid[i]))
+            knowledge.add(AtMostOne(*[grid[k][i] for k in range(n)]))
+            continue
+        knowledge.add(Or(*grid[i]))
+        for j in range(n):
+            for k in range(n):
+                if j != k:
+                    knowledge.add(Implication(grid[i][j], Not(grid[i][k])))
+                    knowledge.add(Implication(grid[j][i], Not(grid[k][i])))
+    knowledge.add(grid[0][0])
+    return knowledge, [symbol for row in grid for symbol in row]
+
+
+def benchmark_cardinality():
+    """Compares pairwise exclusions with cardinality constraints."""
+    print("cardinality constraints: nodes and seconds per model_check_many")
+    for n in [3, 4, 8, 16]:
+        for cardinality in [False, True]:
+            knowledge, symbols = assignment(n, cardinality)
+            timings = []
+            methods = ["sat", "bitset", "enumerate"] if n <= 4 else ["sat"]
+            for method in methods:
+                start = time.perf_counter()
+                model_check_many(knowledge, symbols, method=method)
+                timings.append(
+                    f"{method} {time.perf_counter() - start:.4f}s"
+                )
+            label = "cardinality" if cardinality else "pairwise"
+            print(f"  n={n:<3} {label:<12} nodes {count_nodes(knowledge):<7}",
+                  ", ".join(timings))
+
+
+def benchmark_compiled():
+    """Times repeated queries against a knowledge base compiled to a BDD."""
+    from bdd import CompiledKB
+
+    print("compiled knowledge base: seconds for every symbol query")
+    for n in [4, 6, 8]:
+        knowledge, symbols = assignment(n, cardinality=True)
+        start = time.perf_counter()
+        compiled = CompiledKB(knowledge)
+        compile_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for symbol in symbols:
+            compiled.entails(symbol)
+            compiled.entails(Not(symbol))
+        query_time = time.perf_counter() - start
+        start = time.perf_counter()
+        models = compiled.count_models()
+        count_time = time.perf_counter() - start
+        print(f"  n={n:<3} nodes {len(compiled):<6} compile {compile_time:.4f}s,",
+              f"{2 * len(symbols)} queries {query_time:.4f}s,",
+              f"{models} models counted in {count_time:.4f}s")
+
+
+def benchmark_parallel():
+    """Times parallel enumeration of the pairwise puzzle as workers grow."""
+    import os
+
+    from parallel import entails_many
+
+    print("parallel enumeration: seconds for every symbol query")
+    knowledge, symbols = assignment(4, cardinality=False)
+    start = time.perf_counter()
+    model_check_many(knowledge, symbols, method="enumerate")
+    print(f"  sequential  {time.perf_counter() - start:.4f}s")
+    processes = 1
+    while processes <= os.cpu_count():
+        start = time.perf_counter()
+        entails_many(knowledge, symbols, processes=processes)
+        print(f"  {processes:<3} workers {time.perf_counter() - start:.4f}s")
+        processes *= 2
+
+
+def benchmark_resolution():
+    """Times a short resolution proof inside a knowledge base of many symbols."""
+    from resolution import Resolution, ResolutionLimit, resolution_check
+
+    print("resolution: short proof among many symbols")
+    for n in [50, 200, 800]:
+        chain = [Symbol(f"c{i}") for i in range(n)]
+        knowledge = And(chain[0])
+        for i in range(n - 1):
+            knowledge.add(Implication(chain[i], chain[i + 1]))
+            knowledge.add(Or(Symbol(f"a{i}"), Symbol(f"b{i}")))
+        query = chain[5]
+        start = time.perf_counter()
+        prover = Resolution(knowledge, query)
+        entailed = prover.prove()
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        model_check(knowledge, query)
+        sat_time = time.perf_counter() - start
+        print(f"  {3 * n - 2:<5} symbols: resolution {elapsed:.4f}s",
+              f"({entailed}, {prover.nodes} nodes, {prover.steps} steps,",
+              f"{len(prover.proof())} proof lines), sat {sat_time:.4f}s")
+
+    # Few symbols, but cardinality constraints whose clauses multiply
+    p = [Symbol(f"p{i}") for i in range(6)]
+    knowledge = ExactlyOne(p[3], AtLeastK(
+        1, p[1], AtLeastK(2, p[4], p[1], p[3]), ExactlyOne(p[5], p[0])
+    ))
+    query = ExactlyOne(AtLeastK(0, p[0], p[5], p[2]), p[4], p[1])
+    start = time.perf_counter()
+    try:
+        result = resolution_check(knowledge, query)
+    except ResolutionLimit as error:
+        result = error
+    print(f"  6     symbols, nested cardinalities: {result}",
+          f"in {time.perf_counter() - start:.4f}s,",
+          f"sat {model_check(knowledge, query)}")
+
+
+def benchmark_codebreaker():
+    """Reports per-move latency of the Mastermind codebreaker."""
+    import random
+
+    from codebreaker import Codebreaker, feedback
+
+    print("codebreaker: seconds per move")
+    for colors in [4, 6, 8]:
+        start = time.perf_counter()
+        codebreaker = Codebreaker(colors)
+        setup = time.perf_counter() - start
+        secret = random.Random(colors).choice(codebreaker.all_codes)
+        moves = []
+        while True:
+            start = time.perf_counter()
+            guess = codebreaker.next_guess()
+            result = feedback(guess, secret)
+            codebreaker.add_feedback(guess, result)
+            moves.append(time.perf_counter() - start)
+            if guess == secret:
+                break
+        print(f"  {colors} colors: {len(codebreaker.all_codes)} codes",
+              f"enumerated in {setup:.4f}s, moves",
+              ", ".join(f"{move:.4f}s" for move in moves))
+
+
+if __name__ == "__main__":
+    benchmark_cardinality()
+    benchmark_compiled()
+    benchmark_parallel()
+    benchmark_resolution()
+    benchmark_codebreaker()
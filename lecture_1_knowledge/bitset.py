@@ -0,0 +1,187 @@
+import numpy as np
+
+from logic import *
+
+ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+# Truth table columns of the first six symbols inside one 64-row word
+WORD_PATTERNS = [
+    np.uint64(0xAAAAAAAAAAAAAAAA),
+    np.uint64(0xCCCCCCCCCCCCCCCC),
+    np.uint64(0xF0F0F0F0F0F0F0F0),
+    np.uint64(0xFF00FF00FF00FF00),
+    np.uint64(0xFFFF0000FFFF0000),
+    np.uint64(0xFFFFFFFF00000000),
+]
+
+
+class TruthTable():
+    """Evaluates sentences over every model at once with packed bitsets.
+
+    Row r of the truth table assigns symbol i the value of bit i of r.
+    Each sentence is lowered to a program of bitwise operations over
+    uint64 arrays holding one bit per row, and the table is swept in chunks
+    of 2 ** chunk_bits rows (at least one word) so memory stays bounded for
+    large tables.
+    """
+
+    def __init__(self, sentences, symbols=None, chunk_bits=24):
+        if symbols is None:
+            symbols = frozenset().union(*[s.symbols() for s in sentences])
+        self.symbols = sorted(symbols)
+        self.index = {name: i for i, name in enumerate(self.symbols)}
+        self.chunk_bits = min(len(self.symbols), max(6, chunk_bits))
+        self.program = []
+        self.registers = {}
+        self.outputs = [self._compile(sentence) for sentence in sentences]
+        self.last_use = self._last_use()
+
+    def __len__(self):
+        """Returns the number of chunks in the table."""
+        return 2 ** (len(self.symbols) - self.chunk_bits)
+
+    def chunks(self):
+        """Yields, per chunk, the packed column of each sentence.
+
+        Bits past the end of the table in a partial word are cleared.
+        """
+        words = max(1, 2 ** self.chunk_bits // 64)
+        mask = None
+        if self.chunk_bits < 6:
+            mask = np.uint64((1 << 2 ** self.chunk_bits) - 1)
+        for chunk in range(len(self)):
+            columns = self._run(chunk, words)
+            if mask is not None:
+                columns = [column & mask for column in columns]
+            yield columns
+
+    def _compile(self, sentence):
+        """Appends instructions for a sentence, returning its register."""
+        if sentence in self.registers:
+            return self.registers[sentence]
+
+        extra = None
+        if isinstance(sentence, Symbol):
+            instruction = ("symbol", ())
+            extra = self.index[sentence.name]
+        elif isinstance(sentence, Not):
+            instruction = ("not", (self._compile(sentence.operand),))
+        elif isinstance(sentence, And):
+            instruction = ("and", tuple(
+                self._compile(conjunct) for conjunct in sentence.conjuncts
+            ))
+        elif isinstance(sentence, Or):
+            instruction = ("or", tuple(
+                self._compile(disjunct) for disjunct in sentence.disjuncts
+            ))
+        elif isinstance(sentence, Implication):
+            instruction = ("implies", (self._compile(sentence.antecedent),
+                                       self._compile(sentence.consequent)))
+        elif isinstance(sentence, Biconditional):
+            instruction = ("iff", (self._compile(sentence.left),
+                                   self._compile(sentence.right)))
+        elif isinstance(sentence, Cardinality):
+            instruction = ("count", tuple(
+                self._compile(operand) for operand in sentence.operands
+            ))
+            extra = (sentence.low, sentence.high)
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        self.program.append(instruction + (extra,))
+        register = len(self.program) - 1
+        self.registers[sentence] = register
+        return register
+
+    def _last_use(self):
+        """Maps each register to the last instruction that reads it."""
+        last_use = {}
+        for i, (op, args, extra) in enumerate(self.program):
+            for arg in args:
+                last_use[arg] = i
+        for register in self.outputs:
+            last_use[register] = len(self.program)
+        return last_use
+
+    def _column(self, i, chunk, words):
+        """Returns the packed column of symbol i within a chunk."""
+        if i < 6:
+            return np.full(words, WORD_PATTERNS[i], dtype=np.uint64)
+        if i < self.chunk_bits:
+            bits = (np.arange(words) >> (i - 6)) & 1
+            return np.where(bits.astype(bool), ONES, np.uint64(0))
+        value = ONES if (chunk >> (i - self.chunk_bits)) & 1 else 0
+        return np.full(words, value, dtype=np.uint64)
+
+    def _run(self, chunk, words):
+        """Runs the program on one chunk of the truth table."""
+        values = {}
+        for i, (op, args, extra) in enumerate(self.program):
+            if op == "symbol":
+                result = self._column(extra, chunk, words)
+            elif op == "not":
+                result = ~values[args[0]]
+            elif op == "and":
+                result = np.full(words, ONES, dtype=np.uint64)
+                for arg in args:
+                    result &= values[arg]
+            elif op == "or":
+                result = np.zeros(words, dtype=np.uint64)
+                for arg in args:
+                    result |= values[arg]
+            elif op == "count":
+                result = self._count([values[arg] for arg in args],
+                                     *extra, words)
+            elif op == "implies":
+                result = ~values[args[0]] | values[args[1]]
+            else:
+                result = ~(values[args[0]] ^ values[args[1]])
+            values[i] = result
+
+            # Free registers no later instruction reads
+            for arg in args:
+                if self.last_use[arg] == i:
+                    values.pop(arg, None)
+        return [values[register] for register in self.outputs]
+
+    def _count(self, columns, low, high, words):
+        """Returns rows where between low and high columns are set.
+
+        Keeps bitwise counters counts[j] = "at least j + 1 set so far".
+        """
+        n = len(columns)
+        counts = [np.zeros(words, dtype=np.uint64)
+                  for _ in range(min(n, max(low, high + 1)))]
+        for column in columns:
+            for j in range(len(counts) - 1, 0, -1):
+                counts[j] |= counts[j - 1] & column
+            if counts:
+                counts[0] |= column
+        result = np.full(words, ONES, dtype=np.uint64)
+        if low > n:
+            result[:] = 0
+        elif low > 0:
+            result &= counts[low - 1]
+        if high < n:
+            result &= ~counts[high]
+        return result
+
+
+def entails(knowledge, query, chunk_bits=24):
+    """Checks if knowledge entails query over the whole truth table."""
+    return entails_many(knowledge, [query], chunk_bits=chunk_bits)[0]
+
+
+def entails_many(knowledge, queries, chunk_bits=24):
+    """Checks which queries knowledge entails in one sweep of the table."""
+    table = TruthTable([knowledge] + list(queries), chunk_bits=chunk_bits)
+    entailed = [True] * len(queries)
+    pending = list(range(len(queries)))
+    for kb, *columns in table.chunks():
+        if not pending:
+            break
+        for i in pending:
+            if (kb & ~columns[i]).any():
+                entailed[i] = False
+        pending = [i for i in pending if entailed[i]]
+    return entailed
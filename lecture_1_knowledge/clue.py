@@ -21,10 +21,11 @@ symbols = characters + rooms + weapons
 
 
 def check_knowledge(knowledge):
+    entailed = check_symbols(knowledge, symbols)
     for symbol in symbols:
-        if model_check(knowledge, symbol):
+        if entailed[symbol]:
             termcolor.cprint(f"{symbol}: YES", "green")
-        elif not model_check(knowledge, Not(symbol)):
+        elif entailed[symbol] is None:
             print(f"{symbol}: MAYBE")
 
 
@@ -0,0 +1,189 @@
+import collections
+import concurrent.futures
+import os
+import random
+
+from logic import *
+from sat import Encoder
+
+COLORS = ["red", "blue", "green", "yellow", "purple", "orange", "white",
+          "black"]
+
+# Below this many feedback computations a move is scored in-process
+PARALLEL_THRESHOLD = 200000
+
+
+class Codebreaker():
+    """Plays mastermind.py's game by choosing informative guesses.
+
+    A code places a different color at each position, as in mastermind.py,
+    with symbol f"{color}{position}" true when the color sits there. The
+    rules become a knowledge base whose models (the codes) are enumerated
+    once with the SAT solver and cached. Each feedback is added to the
+    knowledge base as a sentence and prunes the cached codes, so the
+    consistent codes are never re-enumerated. The next guess minimizes the
+    expected number of consistent codes left after its feedback.
+    """
+
+    def __init__(self, colors=4, positions=4, processes=None):
+        self.colors = COLORS[:colors]
+        self.positions = positions
+        self.processes = processes or os.cpu_count()
+        self.knowledge = And()
+        for i in range(positions):
+            self.knowledge.add(ExactlyOne(
+                *[self.symbol(color, i) for color in range(colors)]
+            ))
+        for color in range(colors):
+            self.knowledge.add(AtMostOne(
+                *[self.symbol(color, i) for i in range(positions)]
+            ))
+        self.all_codes = self.enumerate_codes()
+        self.codes = list(self.all_codes)
+        self.guesses = []
+
+    def symbol(self, color, position):
+        return Symbol(f"{self.colors[color]}{position}")
+
+    def model(self, code):
+        """Returns the assignment of every symbol for a code."""
+        return {
+            f"{color}{i}": code[i] == c
+            for c, color in enumerate(self.colors)
+            for i in range(self.positions)
+        }
+
+    def enumerate_codes(self):
+        """Lists every model of the rules by blocking each one found."""
+        encoder = Encoder()
+        encoder.add(self.knowledge)
+        variables = [[encoder.variable(self.symbol(c, i).name)
+                      for c in range(len(self.colors))]
+                     for i in range(self.positions)]
+        codes = []
+        while encoder.solver.solve():
+            model = encoder.solver.model
+            code = tuple(
+                next(c for c, v in enumerate(row) if model[v])
+                for row in variables
+            )
+            codes.append(code)
+            encoder.solver.add_clause(
+                [-variables[i][c] for i, c in enumerate(code)]
+            )
+        return sorted(codes)
+
+    def clue(self, guess, feedback):
+        """Returns the sentence a guess and its (black, white) feedback add.
+
+        Black counts colors in the right position, white counts guessed
+        colors present elsewhere in the code.
+        """
+        black, white = feedback
+        placed = [self.symbol(c, i) for i, c in enumerate(guess)]
+        elsewhere = [
+            Or(*[self.symbol(c, j)
+                 for j in range(self.positions) if j != i])
+            for i, c in enumerate(guess)
+        ]
+        return And(exactly(black, placed), exactly(white, elsewhere))
+
+    def add_feedback(self, guess, feedback):
+        """Adds a clue to the knowledge base and prunes the codes."""
+        clue = self.clue(guess, feedback)
+        self.knowledge.add(clue)
+        self.codes = [code for code in self.codes
+                      if clue.evaluate(self.model(code))]
+        self.guesses.append((guess, feedback))
+
+    def known(self):
+        """Maps each symbol to True or False if entailed, otherwise None.
+
+        Answered from the cached consistent codes, which are exactly the
+        models of the knowledge base.
+        """
+        result = {}
+        for i in range(self.positions):
+            colors = {code[i] for code in self.codes}
+            for c in range(len(self.colors)):
+                if colors == {c}:
+                    result[self.symbol(c, i)] = True
+                elif c in colors:
+                    result[self.symbol(c, i)] = None
+                else:
+                    result[self.symbol(c, i)] = False
+        return result
+
+    def next_guess(self):
+        """Returns the guess minimizing expected consistent codes left."""
+        if len(self.codes) <= 2:
+            return self.codes[0]
+
+        # Before any feedback every code is the same up to relabeling
+        if not self.guesses:
+            return self.all_codes[0]
+
+        candidates = self.all_codes
+        scores = self.score(candidates)
+        consistent = set(self.codes)
+        return min(
+            zip(scores, candidates),
+            key=lambda pair: (pair[0], pair[1] not in consistent, pair[1])
+        )[1]
+
+    def score(self, candidates):
+        """Returns the sum of squared partition sizes for each candidate.
+
+        Dividing by the number of consistent codes gives the expected
+        number left after the candidate's feedback.
+        """
+        work = len(candidates) * len(self.codes)
+        if self.processes == 1 or work < PARALLEL_THRESHOLD:
+            return score_guesses(candidates, self.codes)
+
+        size = -(-len(candidates) // (self.processes * 4))
+        chunks = [candidates[i:i + size]
+                  for i in range(0, len(candidates), size)]
+        with concurrent.futures.ProcessPoolExecutor(self.processes) as executor:
+            results = executor.map(score_guesses, chunks,
+                                   [self.codes] * len(chunks))
+            return [score for chunk in results for score in chunk]
+
+    def play(self, secret, log=False):
+        """Plays until the secret code is guessed, returning the guesses."""
+        while True:
+            guess = self.next_guess()
+            result = feedback(guess, secret)
+            if log:
+                colors = " ".join(self.colors[c] for c in guess)
+                print(f"Guess {len(self.guesses) + 1}: {colors} -> {result}")
+            self.add_feedback(guess, result)
+            if result[0] == self.positions:
+                return [guess for guess, _ in self.guesses]
+
+
+def exactly(k, sentences):
+    """Returns a sentence true when exactly k of the sentences are."""
+    return And(AtLeastK(k, *sentences), Not(AtLeastK(k + 1, *sentences)))
+
+
+def feedback(guess, code):
+    """Returns (black, white) pegs for a guess against a code."""
+    black = sum(g == c for g, c in zip(guess, code))
+    return black, len(set(guess) & set(code)) - black
+
+
+def score_guesses(guesses, codes):
+    """Returns the sum of squared feedback partition sizes per guess."""
+    scores = []
+    for guess in guesses:
+        partitions = collections.Counter(
+            feedback(guess, code) for code in codes
+        )
+        scores.append(sum(n * n for n in partitions.values()))
+    return scores
+
+
+if __name__ == "__main__":
+    codebreaker = Codebreaker()
+    codebreaker.play(random.choice(codebreaker.all_codes), log=True)
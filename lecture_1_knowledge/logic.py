@@ -1,25 +1,118 @@
 import itertools
+import weakref
 
 
 class Sentence():
+    """Base class of logical sentences.
+
+    Nodes are slotted and cache their hash and frozen symbol set. Every
+    node type except And is hash-consed: building a node equal to a live
+    one returns that same object, so duplicates share memory and compare
+    by identity first. Since And.add changes a conjunction in place, nodes
+    built on one register with it and are refreshed when it changes.
+    """
+
+    __slots__ = ("_hash", "_symbols", "_parents", "__weakref__")
+
+    # Live hash-consed nodes, keyed on node type and operand identities
+    interned = weakref.WeakValueDictionary()
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
     def formula(self):
-        """Returns string formula representing logical sentence."""
-        return ""
+        """Returns string formula representing logical sentence.
+
+        Renders from an explicit stack of pieces in a single pass, so time is
+        linear in the length of the formula and deep sentences do not hit
+        the recursion limit.
+        """
+        out = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                out.append(item)
+            else:
+                stack.extend(reversed(item.pieces()))
+        return "".join(out)
+
+    def pieces(self):
+        """Returns the strings and subsentences making up the formula."""
+        return []
+
+    def bare(self):
+        """Checks if the formula can be nested without parentheses."""
+        return True
+
+    def children(self):
+        """Returns the direct subsentences of the logical sentence."""
+        return []
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozen set of all symbols in the logical sentence."""
+        return frozenset()
+
+    def refresh(self):
+        """Recomputes the cached hash and symbol set from the operands."""
+
+    def track(self):
+        """Registers with operands that can change, see And.add."""
+        for child in self.children():
+            if getattr(child, "_parents", None) is not None:
+                if getattr(self, "_parents", None) is None:
+                    self._parents = []
+                child._parents.append(weakref.ref(self))
+
+    def changed(self):
+        """Refreshes every live sentence built on this one."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            node._parents = [ref for ref in node._parents
+                             if ref() is not None]
+            for ref in node._parents:
+                parent = ref()
+                parent.refresh()
+                stack.append(parent)
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def intern(cls, key):
+        """Returns (node, created), reusing the live node for key if any."""
+        key = (cls,) + key
+        node = Sentence.interned.get(key)
+        if node is not None:
+            return node, False
+        node = object.__new__(cls)
+        Sentence.interned[key] = node
+        return node, True
+
+    @classmethod
+    def nest(cls, sentence):
+        """Returns the pieces for a subsentence, parenthesized if needed."""
+        if sentence.bare():
+            return [sentence]
+        return ["(", sentence, ")"]
+
+    @classmethod
+    def join(cls, separator, sentences):
+        """Returns the pieces for subsentences joined by a separator."""
+        pieces = []
+        for sentence in sentences:
+            if pieces:
+                pieces.append(separator)
+            pieces.extend(Sentence.nest(sentence))
+        return pieces
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -43,15 +136,26 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        self, created = cls.intern((name,))
+        if created:
+            self.name = name
+            self._hash = hash(("symbol", name))
+            self._symbols = frozenset([name])
+        return self
 
-    def __init__(self, name):
-        self.name = name
+    def __reduce__(self):
+        return (type(self), (self.name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -65,20 +169,45 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
+    def pieces(self):
+        return [self.name]
+
+    def bare(self):
+        return Sentence.parenthesize(self.name) == self.name
+
+    def children(self):
+        return []
+
     def symbols(self):
-        return {self.name}
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        self, created = cls.intern((id(operand),))
+        if created:
+            self.operand = operand
+            self.refresh()
+            self.track()
+        return self
+
+    def refresh(self):
+        self._hash = hash(("not", hash(self.operand)))
+        self._symbols = self.operand.symbols()
+
+    def __reduce__(self):
+        return (type(self), (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +215,52 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+    def pieces(self):
+        return ["¬"] + Sentence.nest(self.operand)
+
+    def bare(self):
+        return False
+
+    def children(self):
+        return [self.operand]
 
     def symbols(self):
-        return self.operand.symbols()
+        return self._symbols
 
 
 class And(Sentence):
+    """Conjunction. Not hash-consed, since `add` mutates it in place.
+
+    The hash is computed on first use after a change, and `add` refreshes
+    the cached hash and symbols of every sentence built on it. As with any
+    mutable key, a dict or set already holding the conjunction, or a
+    sentence built on it, must be rebuilt after `add`.
+    """
+
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
+        self._parents = []
+        self.refresh()
+        self.track()
+
+    def __reduce__(self):
+        return (type(self), tuple(self.conjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash(
+                ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+            )
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -113,36 +268,72 @@ class And(Sentence):
         )
         return f"And({conjunctions})"
 
+    def refresh(self):
+        self._hash = None
+        self._symbols = frozenset().union(
+            *[conjunct.symbols() for conjunct in self.conjuncts]
+        )
+
     def add(self, conjunct):
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
+        if getattr(conjunct, "_parents", None) is not None:
+            conjunct._parents.append(weakref.ref(self))
+        self._hash = None
+        self._symbols = self._symbols | conjunct.symbols()
+        self.changed()
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def pieces(self):
         if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ^ ".join([Sentence.parenthesize(conjunct.formula())  # FOR MAC  ∧
-                           for conjunct in self.conjuncts])
+            return [self.conjuncts[0]]
+        return Sentence.join(" ^ ", self.conjuncts)  # FOR MAC  ∧
+
+    def bare(self):
+        if len(self.conjuncts) == 1:
+            return self.conjuncts[0].bare()
+        return not self.conjuncts
+
+    def children(self):
+        return list(self.conjuncts)
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return self._symbols
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        self, created = cls.intern(tuple(id(d) for d in disjuncts))
+        if created:
+            self.disjuncts = list(disjuncts)
+            self.refresh()
+            self.track()
+        return self
+
+    def refresh(self):
+        self._hash = hash(
+            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        )
+        self._symbols = frozenset().union(
+            *[disjunct.symbols() for disjunct in self.disjuncts]
+        )
+
+    def __reduce__(self):
+        return (type(self), tuple(self.disjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +342,55 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def pieces(self):
         if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+            return [self.disjuncts[0]]
+        return Sentence.join(" ∨  ", self.disjuncts)
+
+    def bare(self):
+        if len(self.disjuncts) == 1:
+            return self.disjuncts[0].bare()
+        return not self.disjuncts
+
+    def children(self):
+        return list(self.disjuncts)
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return self._symbols
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        self, created = cls.intern((id(antecedent), id(consequent)))
+        if created:
+            self.antecedent = antecedent
+            self.consequent = consequent
+            self.refresh()
+            self.track()
+        return self
+
+    def refresh(self):
+        self._hash = hash(
+            ("implies", hash(self.antecedent), hash(self.consequent))
+        )
+        self._symbols = self.antecedent.symbols() | self.consequent.symbols()
+
+    def __reduce__(self):
+        return (type(self), (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +399,50 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+    def pieces(self):
+        return (Sentence.nest(self.antecedent) + [" => "]
+                + Sentence.nest(self.consequent))
+
+    def bare(self):
+        return False
+
+    def children(self):
+        return [self.antecedent, self.consequent]
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return self._symbols
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        self, created = cls.intern((id(left), id(right)))
+        if created:
+            self.left = left
+            self.right = right
+            self.refresh()
+            self.track()
+        return self
+
+    def refresh(self):
+        self._hash = hash(("biconditional", hash(self.left), hash(self.right)))
+        self._symbols = self.left.symbols() | self.right.symbols()
+
+    def __reduce__(self):
+        return (type(self), (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,17 +453,168 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+    def pieces(self):
+        return Sentence.nest(self.left) + [" <=> "] + Sentence.nest(self.right)
+
+    def bare(self):
+        return False
+
+    def children(self):
+        return [self.left, self.right]
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return self._symbols
+
+
+class Cardinality(Sentence):
+    """Holds when the number of true operands is within [low, high].
 
+    Evaluation counts true operands in one pass instead of expanding into
+    pairwise clauses. Subclasses fix the bounds.
+    """
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    __slots__ = ("operands", "low", "high")
+
+    @classmethod
+    def build(cls, low, high, operands):
+        for operand in operands:
+            Sentence.validate(operand)
+        self, created = cls.intern(
+            (low, high) + tuple(id(operand) for operand in operands)
+        )
+        if created:
+            self.operands = list(operands)
+            self.low = low
+            self.high = high
+            self.refresh()
+            self.track()
+        return self
+
+    def refresh(self):
+        self._hash = hash((type(self).__name__, self.low, self.high,
+                           tuple(hash(operand) for operand in self.operands)))
+        self._symbols = frozenset().union(
+            *[operand.symbols() for operand in self.operands]
+        )
+
+    def __eq__(self, other):
+        return self is other or (
+            type(self) is type(other)
+            and self.low == other.low
+            and self.high == other.high
+            and self.operands == other.operands
+        )
+
+    def __hash__(self):
+        return self._hash
+
+    def evaluate(self, model):
+        count = 0
+        for operand in self.operands:
+            if operand.evaluate(model):
+                count += 1
+                if count > self.high:
+                    return False
+        return count >= self.low
+
+    def children(self):
+        return list(self.operands)
+
+    def bare(self):
+        return False
+
+    def listing(self, head):
+        """Returns pieces for head followed by the operands and ")"."""
+        pieces = [head]
+        for i, operand in enumerate(self.operands):
+            if i:
+                pieces.append(", ")
+            pieces.append(operand)
+        return pieces + [")"]
+
+    def symbols(self):
+        return self._symbols
+
+
+class ExactlyOne(Cardinality):
+    __slots__ = ()
+
+    def __new__(cls, *operands):
+        return cls.build(1, 1, operands)
+
+    def __reduce__(self):
+        return (type(self), tuple(self.operands))
+
+    def __repr__(self):
+        operands = ", ".join([str(operand) for operand in self.operands])
+        return f"ExactlyOne({operands})"
+
+    def pieces(self):
+        return self.listing("ExactlyOne(")
+
+
+class AtMostOne(Cardinality):
+    __slots__ = ()
+
+    def __new__(cls, *operands):
+        return cls.build(0, 1, operands)
+
+    def __reduce__(self):
+        return (type(self), tuple(self.operands))
+
+    def __repr__(self):
+        operands = ", ".join([str(operand) for operand in self.operands])
+        return f"AtMostOne({operands})"
+
+    def pieces(self):
+        return self.listing("AtMostOne(")
+
+
+class AtLeastK(Cardinality):
+    __slots__ = ()
+
+    def __new__(cls, k, *operands):
+        return cls.build(k, len(operands), operands)
+
+    def __reduce__(self):
+        return (type(self), (self.low,) + tuple(self.operands))
+
+    def __repr__(self):
+        operands = ", ".join([str(operand) for operand in self.operands])
+        return f"AtLeastK({self.low}, {operands})"
+
+    def pieces(self):
+        return self.listing(f"AtLeastK({self.low}, ")
+
+
+def model_check(knowledge, query, method="sat"):
+    """Checks if knowledge base entails query.
+
+    `method` is "sat" to refute knowledge ^ ¬query with the CDCL solver in
+    sat.py, "bitset" to sweep the whole truth table with NumPy bitsets in
+    bitset.py, "bdd" to compile both to a binary decision diagram in bdd.py,
+    "parallel" to enumerate models across processes in parallel.py,
+    "resolution" to refute with the resolution prover in resolution.py
+    (handing over to "sat" if it derives too many clauses), or
+    "enumerate" to check every model (the reference mode).
+    """
+    if method == "sat":
+        from sat import entails
+        return entails(knowledge, query)
+    elif method == "bitset":
+        from bitset import entails
+        return entails(knowledge, query)
+    elif method == "bdd":
+        from bdd import entails
+        return entails(knowledge, query)
+    elif method == "parallel":
+        from parallel import entails
+        return entails(knowledge, query)
+    elif method == "resolution":
+        from resolution import entails
+        return entails(knowledge, query)
+    elif method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,7 +645,71 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_many(knowledge, queries, method="sat"):
+    """Checks which of the queries the knowledge base entails.
+
+    Returns a list of booleans in the order of queries. The knowledge base
+    is encoded (or enumerated) once and every query is answered from it,
+    except by "resolution", which refutes each query on its own. Methods
+    are those of model_check.
+    """
+    queries = list(queries)
+    if method == "sat":
+        from sat import entails_many
+        return entails_many(knowledge, queries)
+    elif method == "bitset":
+        from bitset import entails_many
+        return entails_many(knowledge, queries)
+    elif method == "bdd":
+        from bdd import entails_many
+        return entails_many(knowledge, queries)
+    elif method == "parallel":
+        from parallel import entails_many
+        return entails_many(knowledge, queries)
+    elif method == "resolution":
+        from resolution import entails_many
+        return entails_many(knowledge, queries)
+    elif method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
+
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    entailed = [True] * len(queries)
+    pending = list(range(len(queries)))
+
+    # Visit each model once, dropping queries as soon as one is false
+    for values in itertools.product((True, False), repeat=len(symbols)):
+        if not pending:
+            break
+        model = dict(zip(symbols, values))
+        if knowledge.evaluate(model):
+            for i in pending:
+                if not queries[i].evaluate(model):
+                    entailed[i] = False
+            pending = [i for i in pending if entailed[i]]
+    return entailed
+
+
+def check_symbols(knowledge, symbols, method="sat"):
+    """Maps each symbol to True or False if entailed, otherwise None."""
+    queries = []
+    for symbol in symbols:
+        queries.extend([symbol, Not(symbol)])
+    entailed = model_check_many(knowledge, queries, method=method)
+
+    result = {}
+    for i, symbol in enumerate(symbols):
+        if entailed[2 * i]:
+            result[symbol] = True
+        elif entailed[2 * i + 1]:
+            result[symbol] = False
+        else:
+            result[symbol] = None
+    return result
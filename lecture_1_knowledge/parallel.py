@@ -0,0 +1,95 @@
+import concurrent.futures
+import itertools
+import math
+import multiprocessing
+import os
+
+from logic import *
+
+# Models a worker enumerates between checks for cancellation
+CHECK_INTERVAL = 4096
+
+# State each worker process receives once, see start_worker
+worker = {}
+
+
+def start_worker(knowledge, queries, symbols, split, stop):
+    """Stores the problem in the worker process before any cube runs."""
+    worker.update(knowledge=knowledge, queries=queries, symbols=symbols,
+                  split=split, stop=stop)
+
+
+def check_cube(cube):
+    """Enumerates the models of one cube, returning refuted query indices.
+
+    Bit i of `cube` fixes the value of the i-th of the first `split`
+    symbols; the remaining symbols are enumerated exhaustively.
+    """
+    knowledge = worker["knowledge"]
+    queries = worker["queries"]
+    symbols = worker["symbols"]
+    split = worker["split"]
+    stop = worker["stop"]
+
+    model = {symbols[i]: bool((cube >> i) & 1) for i in range(split)}
+    free = symbols[split:]
+    pending = list(range(len(queries)))
+    refuted = []
+    for count, values in enumerate(
+        itertools.product((True, False), repeat=len(free))
+    ):
+        if count % CHECK_INTERVAL == 0 and stop.is_set():
+            break
+        model.update(zip(free, values))
+        if knowledge.evaluate(model):
+            remaining = []
+            for i in pending:
+                if queries[i].evaluate(model):
+                    remaining.append(i)
+                else:
+                    refuted.append(i)
+            pending = remaining
+            if not pending:
+                break
+    return refuted
+
+
+def entails_many(knowledge, queries, processes=None, split=None):
+    """Checks which queries knowledge entails, enumerating in parallel.
+
+    The first `split` symbols are fixed into 2 ** split cubes and each cube
+    is enumerated by a worker process. Once every query has a counter-model
+    the remaining cubes are cancelled and running workers told to stop.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]
+    ))
+    processes = processes or os.cpu_count()
+    if split is None:
+        split = math.ceil(math.log2(processes * 8))
+    split = min(split, len(symbols))
+
+    stop = multiprocessing.Event()
+    refuted = set()
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes, initializer=start_worker,
+        initargs=(knowledge, queries, symbols, split, stop)
+    ) as executor:
+        futures = [executor.submit(check_cube, cube)
+                   for cube in range(2 ** split)]
+        for future in concurrent.futures.as_completed(futures):
+            refuted.update(future.result())
+            if len(refuted) == len(queries):
+                stop.set()
+                for other in futures:
+                    other.cancel()
+                break
+    return [i not in refuted for i in range(len(queries))]
+
+
+def entails(knowledge, query, processes=None, split=None):
+    """Checks if knowledge entails query, enumerating in parallel."""
+    return entails_many(knowledge, [query], processes, split)[0]
@@ -0,0 +1,182 @@
+import re
+
+from logic import *
+
+# Operators, punctuation, symbol names, numbers or a stray character,
+# after optional spaces
+TOKEN = re.compile(
+    r"\s*(?:(<=>|=>|¬|~|\^|∧|∨|\||\(|\)|,)|([A-Za-z_][A-Za-z0-9_]*)|(\d+)"
+    r"|(\S))"
+)
+
+# Binding power of each binary operator, higher binds tighter
+BINARY = {
+    "<=>": 1,
+    "=>": 2,
+    "∨": 3,
+    "|": 3,
+    "^": 4,
+    "∧": 4,
+}
+PREFIX = 5
+
+CARDINALITY = {
+    "ExactlyOne": ExactlyOne,
+    "AtMostOne": AtMostOne,
+    "AtLeastK": AtLeastK,
+}
+
+
+class ParseError(ValueError):
+    """Raised when text is not a well-formed formula."""
+
+
+def tokenize(text):
+    """Returns the (kind, value, position) tokens of a formula.
+
+    Kinds are "op" for operators and punctuation, "name" and "number".
+    """
+    tokens = []
+    for match in TOKEN.finditer(text):
+        op, name, number, stray = match.groups()
+        if op is not None:
+            tokens.append(("op", op, match.start(1)))
+        elif name is not None:
+            tokens.append(("name", name, match.start(2)))
+        elif number is not None:
+            tokens.append(("number", int(number), match.start(3)))
+        else:
+            raise ParseError(
+                f"unexpected character at {match.start(4)}: {text!r}"
+            )
+    return tokens
+
+
+class Parser():
+    """Pratt parser for the syntax `Sentence.formula` renders.
+
+    Accepts ¬ (or ~), ^ (or ∧), ∨ (or |), => and <=>, from tightest to
+    loosest, plus parentheses and the cardinality forms ExactlyOne(...),
+    AtMostOne(...) and AtLeastK(k, ...). Chains of ^ and ∨ build a single
+    n-ary And or Or, and => associates to the right.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    def parse(self):
+        """Parses the whole text as one sentence."""
+        sentence = self.expression(0)
+        if self.index < len(self.tokens):
+            self.fail("unexpected trailing input")
+        return sentence
+
+    def expression(self, power):
+        """Parses operators binding tighter than power."""
+        left = self.prefix()
+        while True:
+            op = self.peek_op()
+            if op not in BINARY or BINARY[op] <= power:
+                return left
+            self.index += 1
+            if op == "=>":
+                left = Implication(left, self.expression(BINARY[op] - 1))
+            elif op == "<=>":
+                left = Biconditional(left, self.expression(BINARY[op]))
+            else:
+                operands = [left, self.expression(BINARY[op])]
+                while BINARY.get(self.peek_op()) == BINARY[op]:
+                    self.index += 1
+                    operands.append(self.expression(BINARY[op]))
+                left = And(*operands) if op in ("^", "∧") else Or(*operands)
+
+    def prefix(self):
+        """Parses a symbol, negation, parenthesized or cardinality form."""
+        kind, value, position = self.next()
+        if kind == "op" and value in ("¬", "~"):
+            return Not(self.expression(PREFIX - 1))
+        if kind == "op" and value == "(":
+            sentence = self.expression(0)
+            self.expect(")")
+            return sentence
+        if kind == "name" and value in CARDINALITY and self.peek_op() == "(":
+            return self.cardinality(CARDINALITY[value])
+        if kind == "name":
+            return Symbol(value)
+        self.index -= 1
+        self.fail(f"unexpected {value!r}")
+
+    def cardinality(self, cls):
+        """Parses the parenthesized arguments of a cardinality form."""
+        self.expect("(")
+        arguments = []
+        if cls is AtLeastK:
+            kind, value, position = self.next()
+            if kind != "number":
+                self.fail("AtLeastK needs a count")
+            arguments.append(value)
+            if self.peek_op() != ")":
+                self.expect(",")
+        while self.peek_op() != ")":
+            arguments.append(self.expression(0))
+            if self.peek_op() != ")":
+                self.expect(",")
+        self.expect(")")
+        return cls(*arguments)
+
+    def next(self):
+        if self.index >= len(self.tokens):
+            raise ParseError(f"unexpected end of formula: {self.text!r}")
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def peek_op(self):
+        if self.index < len(self.tokens) and self.tokens[self.index][0] == "op":
+            return self.tokens[self.index][1]
+        return None
+
+    def expect(self, op):
+        if self.peek_op() != op:
+            self.fail(f"expected {op!r}")
+        self.index += 1
+
+    def fail(self, message):
+        if self.index < len(self.tokens):
+            position = self.tokens[self.index][2]
+        else:
+            position = len(self.text)
+        raise ParseError(f"{message} at {position}: {self.text!r}")
+
+
+def parse(text):
+    """Parses a formula into a logical sentence."""
+    return Parser(text).parse()
+
+
+def parse_lines(lines):
+    """Yields one sentence per line, skipping blanks and # comments.
+
+    Works on any iterable of lines, such as an open file, and holds only
+    one line at a time, so rule files of any size stream in bounded memory.
+    Repeated subformulas come back as the same hash-consed nodes.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        try:
+            yield parse(line)
+        except ParseError as error:
+            raise ParseError(f"line {number}: {error}") from None
+
+
+def read_knowledge(filename):
+    """Reads a rules file into one conjunction of its sentences."""
+    knowledge = And()
+    with open(filename, encoding="utf-8") as f:
+        for sentence in parse_lines(f):
+            knowledge.add(sentence)
+    return knowledge
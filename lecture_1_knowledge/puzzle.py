@@ -11,32 +11,17 @@ for person in people:
     for house in houses:
         symbols.append(Symbol(f"{person}{house}"))
 
-# Each person belongs to a house.
+# Each person belongs to exactly one house.
 for person in people:
-    knowledge.add(Or(
-        Symbol(f"{person}Gryffindor"),
-        Symbol(f"{person}Hufflepuff"),
-        Symbol(f"{person}Ravenclaw"),
-        Symbol(f"{person}Slytherin")
+    knowledge.add(ExactlyOne(
+        *[Symbol(f"{person}{house}") for house in houses]
     ))
 
-# Only one house per person.
-for person in people:
-    for h1 in houses:
-        for h2 in houses:
-            if h1 != h2:
-                knowledge.add(
-                    Implication(Symbol(f"{person}{h1}"), Not(Symbol(f"{person}{h2}")))
-                )
-
 # Only one person per house.
 for house in houses:
-    for p1 in people:
-        for p2 in people:
-            if p1 != p2:
-                knowledge.add(
-                    Implication(Symbol(f"{p1}{house}"), Not(Symbol(f"{p2}{house}")))
-                )
+    knowledge.add(AtMostOne(
+        *[Symbol(f"{person}{house}") for person in people]
+    ))
 
 knowledge.add(
     Or(Symbol("GilderoyGryffindor"), Symbol("GilderoyRavenclaw"))
@@ -50,6 +35,6 @@ knowledge.add(
     Symbol("MinervaGryffindor")
 )
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
+for symbol, entailed in zip(symbols, model_check_many(knowledge, symbols)):
+    if entailed:
         print(symbol)
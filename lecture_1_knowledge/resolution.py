@@ -0,0 +1,243 @@
+import heapq
+
+from logic import *
+from sat import Encoder
+
+# Clauses resolution_check may derive before giving up, about 100 MB
+MAX_CLAUSES = 100000
+
+
+class ResolutionLimit(RuntimeError):
+    """Raised when the prover passes its step or clause limit."""
+
+
+class ClauseSet():
+    """Stands in for a Solver to collect the clauses an Encoder emits."""
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def add_clause(self, literals):
+        self.clauses.append(frozenset(literals))
+        return True
+
+
+class Resolution():
+    """Resolution refutation prover over the CNF of knowledge ^ ¬query.
+
+    Clauses are frozensets of integer literals, indexed by literal so the
+    clauses that resolve with a given clause are looked up directly. Uses
+    the given-clause loop, shortest clause first, with tautology
+    elimination and forward and backward subsumption.
+
+    With `support` (set of support), only the negated query starts in the
+    queue and every resolution involves at least one clause derived from
+    it. This is refutation complete when the knowledge base is consistent;
+    for a possibly inconsistent knowledge base pass support=False.
+
+    Resolution can derive exponentially many clauses, so prove raises
+    ResolutionLimit past max_steps resolutions or max_clauses clauses.
+    """
+
+    def __init__(self, knowledge, query, support=True, max_steps=None,
+                 max_clauses=None):
+        self.encoder = Encoder(ClauseSet())
+        self.encoder.add(knowledge)
+        self.query = self.encoder.literal(query)
+        goal = frozenset([-self.query])
+        inputs = self.encoder.solver.clauses
+
+        self.clauses = {}
+        self.parents = {}
+        self.index = {}
+        self.seen = set()
+        self.queue = []
+        self.empty = None
+        self.labels = None
+        self.max_steps = max_steps
+        self.max_clauses = max_clauses
+
+        # Counters for benchmarking
+        self.steps = 0
+        self.nodes = 0
+        self.tautologies = 0
+        self.subsumed = 0
+
+        for clause in inputs:
+            if not support or not clause:
+                self._push(clause, None)
+            elif not any(-x in clause for x in clause):
+                self._keep(self._new(clause, None))
+        self._push(goal, None)
+
+    def prove(self):
+        """Runs the given-clause loop, returning True on a refutation."""
+        while self.queue:
+            length, given = heapq.heappop(self.queue)
+            clause = self.clauses[given]
+            if not clause:
+                self.empty = given
+                return True
+            if self._is_subsumed(clause):
+                self.subsumed += 1
+                continue
+            self.nodes += 1
+            self._remove_subsumed_by(clause)
+            self._keep(given)
+
+            # Resolve with every kept clause holding a complementary literal
+            for literal in clause:
+                for other in list(self.index.get(-literal, ())):
+                    self.steps += 1
+                    resolvent = ((clause - {literal})
+                                 | (self.clauses[other] - {-literal}))
+                    if any(-x in resolvent for x in resolvent):
+                        self.tautologies += 1
+                        continue
+                    self._push(resolvent, (given, other))
+                    self._check_limits()
+        return False
+
+    def proof(self):
+        """Returns the lines of the refutation found by prove."""
+        order = []
+        visited = set()
+        stack = [(self.empty, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+            elif node not in visited:
+                visited.add(node)
+                stack.append((node, True))
+                for parent in reversed(self.parents[node] or ()):
+                    stack.append((parent, False))
+
+        numbers = {node: i for i, node in enumerate(order, 1)}
+        lines = []
+        for node in order:
+            parents = self.parents[node]
+            if parents is None:
+                source = "given"
+            else:
+                source = f"from {numbers[parents[0]]}, {numbers[parents[1]]}"
+            lines.append(f"{numbers[node]}. {self.render(self.clauses[node])}"
+                         f"    {source}")
+        return lines
+
+    def render(self, clause):
+        """Returns a clause as a disjunction of readable literals."""
+        if not clause:
+            return "⊥"
+
+        # Symbols by name, Tseitin variables by the subformula they define
+        if self.labels is None:
+            self.labels = dict(self.encoder.names)
+            for sentence, literal in self.encoder.cache.items():
+                if literal < 0:
+                    sentence = Not(sentence)
+                self.labels[abs(literal)] = f"[{sentence.formula()}]"
+            if self.encoder.true is not None:
+                self.labels[self.encoder.true] = "⊤"
+
+        names = []
+        for literal in sorted(clause, key=abs):
+            name = self.labels.get(abs(literal), f"_{abs(literal)}")
+            names.append(name if literal > 0 else f"¬{name}")
+        return " ∨ ".join(names)
+
+    def _check_limits(self):
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise ResolutionLimit(
+                f"gave up after {self.steps} resolution steps"
+            )
+        clauses = len(self.clauses)
+        if self.max_clauses is not None and clauses > self.max_clauses:
+            raise ResolutionLimit(f"gave up after {clauses} clauses")
+
+    def _new(self, clause, parents):
+        node = len(self.clauses)
+        self.clauses[node] = clause
+        self.parents[node] = parents
+        self.seen.add(clause)
+        return node
+
+    def _push(self, clause, parents):
+        """Queues a clause unless it is a tautology or already seen."""
+        if clause in self.seen:
+            return
+        if any(-x in clause for x in clause):
+            self.tautologies += 1
+            return
+        node = self._new(clause, parents)
+        heapq.heappush(self.queue, (len(clause), node))
+
+    def _keep(self, node):
+        for literal in self.clauses[node]:
+            self.index.setdefault(literal, set()).add(node)
+
+    def _is_subsumed(self, clause):
+        """Checks if a kept clause is a subset of clause."""
+        for literal in clause:
+            for other in self.index.get(literal, ()):
+                kept = self.clauses[other]
+                if len(kept) <= len(clause) and kept <= clause:
+                    return True
+        return False
+
+    def _remove_subsumed_by(self, clause):
+        """Drops kept clauses that are supersets of clause."""
+        if not clause:
+            return
+        literal = min(clause, key=lambda x: len(self.index.get(x, ())))
+        for other in list(self.index.get(literal, ())):
+            if clause <= self.clauses[other]:
+                self.subsumed += 1
+                for x in self.clauses[other]:
+                    self.index[x].discard(other)
+
+
+def resolution_check(knowledge, query, support=True, max_steps=None,
+                     max_clauses=MAX_CLAUSES, log=False):
+    """Checks if knowledge entails query by resolution refutation.
+
+    Set of support only finds refutations of a consistent knowledge base,
+    so when it saturates without one, full resolution settles the query.
+    Raises ResolutionLimit if either run passes max_steps or max_clauses.
+    """
+    prover = Resolution(knowledge, query, support=support,
+                        max_steps=max_steps, max_clauses=max_clauses)
+    entailed = prover.prove()
+    if support and not entailed:
+        prover = Resolution(knowledge, query, support=False,
+                            max_steps=max_steps, max_clauses=max_clauses)
+        entailed = prover.prove()
+    if log:
+        print(f"{'Entailed' if entailed else 'Not entailed'}:",
+              f"{prover.nodes} clauses processed,",
+              f"{prover.steps} resolution steps,",
+              f"{prover.subsumed} subsumed,",
+              f"{prover.tautologies} tautologies")
+        if entailed:
+            for line in prover.proof():
+                print(line)
+    return entailed
+
+
+def entails(knowledge, query):
+    """Checks entailment by resolution, or by sat.py past the limits."""
+    try:
+        return resolution_check(knowledge, query)
+    except ResolutionLimit:
+        import sat
+        return sat.entails(knowledge, query)
+
+
+def entails_many(knowledge, queries):
+    """Checks which queries knowledge entails, one refutation each."""
+    return [entails(knowledge, query) for query in queries]
@@ -0,0 +1,569 @@
+import heapq
+
+from logic import *
+
+
+class Solver():
+    """CDCL SAT solver over clauses of integer literals.
+
+    Variables are positive integers, a literal is `v` or `-v`.
+    Uses two watched literals for unit propagation, first-UIP clause
+    learning, activity-based branching with phase saving and Luby restarts.
+    Learned clauses are kept between calls to `solve`, so the solver can be
+    reused incrementally with different assumptions.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.learnts = []
+        self.watches = {}
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.heap = []
+        self.increment = 1.0
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+
+    def new_var(self):
+        """Creates a fresh variable and returns it."""
+        self.num_vars += 1
+        v = self.num_vars
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches[v] = []
+        self.watches[-v] = []
+        heapq.heappush(self.heap, (0.0, v))
+        return v
+
+    def value(self, literal):
+        """Returns True, False or None for the current value of a literal."""
+        value = self.values[abs(literal)]
+        if value is None:
+            return None
+        return value if literal > 0 else not value
+
+    def add_clause(self, literals):
+        """Adds a clause permanently. Returns False if the solver is UNSAT."""
+        if not self.ok:
+            return False
+        self._backtrack(0)
+
+        # Drop duplicates, tautologies and literals already false at level 0
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self._attach(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """Searches for a model in which all assumption literals hold."""
+        self.model = None
+        if not self.ok:
+            return False
+        self._backtrack(0)
+        restarts = 0
+        budget = 100 * luby(restarts)
+        conflicts = 0
+
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+
+                # Conflict without any decision: clause database is UNSAT
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+
+                learnt, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._attach(learnt)
+                    self.learnts.append(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self.increment *= 1.05
+                continue
+
+            # Restart once the conflict budget is used up
+            if conflicts >= budget:
+                restarts += 1
+                budget = 100 * luby(restarts)
+                conflicts = 0
+                self._backtrack(0)
+                continue
+
+            # Assumptions are decided first, one per decision level
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    self._backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self._enqueue(literal, None)
+                continue
+
+            v = self._pick_branch()
+            if v is None:
+                self.model = list(self.values)
+                self._backtrack(0)
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self._enqueue(v if self.phase[v] else -v, None)
+
+    def _attach(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _enqueue(self, literal, reason):
+        v = abs(literal)
+        self.values[v] = literal > 0
+        self.levels[v] = len(self.trail_lim)
+        self.reasons[v] = reason
+        self.trail.append(literal)
+
+    def _propagate(self):
+        """Propagates all pending assignments, returning a conflict clause."""
+        values = self.values
+        while self.qhead < len(self.trail):
+            false_literal = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watchers = self.watches[false_literal]
+            kept = []
+            for i, clause in enumerate(watchers):
+
+                # Keep the false literal in the second watch position
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                value = values[abs(first)]
+                if value is not None and value == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    value = values[abs(literal)]
+                    if value is None or value == (literal > 0):
+                        clause[1], clause[k] = literal, false_literal
+                        self.watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    value = values[abs(first)]
+                    if value is None:
+                        self._enqueue(first, clause)
+                    else:
+                        kept.extend(watchers[i + 1:])
+                        self.watches[false_literal] = kept
+                        self.qhead = len(self.trail)
+                        return clause
+            self.watches[false_literal] = kept
+        return None
+
+    def _analyze(self, conflict):
+        """Derives a first-UIP clause and the level to backjump to."""
+        level = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        counter = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        literal = None
+
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                v = abs(q)
+                if v not in seen and self.levels[v] > 0:
+                    seen.add(v)
+                    self._bump(v)
+                    if self.levels[v] >= level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+
+            # Walk back along the trail to the next marked literal
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            clause = self.reasons[abs(literal)]
+            counter -= 1
+            if counter == 0:
+                break
+
+        learnt[0] = -literal
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Second watch goes on the literal with the highest level
+        best = max(range(1, len(learnt)),
+                   key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def _backtrack(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        for literal in self.trail[self.trail_lim[level]:]:
+            v = abs(literal)
+            self.phase[v] = literal > 0
+            self.values[v] = None
+            self.reasons[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[self.trail_lim[level]:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def _bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[u], u)
+                         for u in range(1, self.num_vars + 1)
+                         if self.values[u] is None]
+            heapq.heapify(self.heap)
+        elif self.values[v] is None:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    def _pick_branch(self):
+        while self.heap:
+            activity, v = heapq.heappop(self.heap)
+            if self.values[v] is None and -activity == self.activity[v]:
+                return v
+        return None
+
+
+class Encoder():
+    """Tseitin encoding of logical sentences into a Solver's clauses.
+
+    Each symbol gets one solver variable. Compound subsentences get an
+    auxiliary variable that is fully defined by its operands, so the
+    definitions can stay in the solver across queries.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = Solver() if solver is None else solver
+        self.variables = {}
+        self.names = {}
+        self.cache = {}
+        self.true = None
+
+    def variable(self, name):
+        """Returns the solver variable for a symbol name."""
+        if name not in self.variables:
+            v = self.solver.new_var()
+            self.variables[name] = v
+            self.names[v] = name
+        return self.variables[name]
+
+    def add(self, sentence):
+        """Asserts that a sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif (isinstance(sentence, Cardinality)
+              and sentence.low <= 1 and sentence.high <= 1):
+            literals = [self.literal(operand) for operand in sentence.operands]
+            if sentence.low == 1:
+                self.solver.add_clause(literals)
+            self._at_most_one(literals)
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.cache:
+            return self.cache[sentence]
+
+        if isinstance(sentence, And):
+            literal = self._gate([self.literal(c) for c in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            literal = -self._gate(
+                [-self.literal(d) for d in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            c = self.literal(sentence.consequent)
+            literal = -self._gate([a, -c])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            literal = self.solver.new_var()
+            self.solver.add_clause([-literal, -a, b])
+            self.solver.add_clause([-literal, a, -b])
+            self.solver.add_clause([literal, a, b])
+            self.solver.add_clause([literal, -a, -b])
+        elif isinstance(sentence, Cardinality):
+            literal = self._cardinality(sentence)
+        else:
+            raise TypeError(f"cannot encode {type(sentence).__name__}")
+
+        self.cache[sentence] = literal
+        return literal
+
+    def model(self):
+        """Returns the solver's last model as a symbol name mapping."""
+        if self.solver.model is None:
+            return None
+        return {name: bool(self.solver.model[v])
+                for name, v in self.variables.items()}
+
+    def _gate(self, literals):
+        """Returns a literal defined as the conjunction of literals."""
+        if not literals:
+            return self._true()
+        if len(literals) == 1:
+            return literals[0]
+        x = self.solver.new_var()
+        for literal in literals:
+            self.solver.add_clause([-x, literal])
+        self.solver.add_clause([x] + [-literal for literal in literals])
+        return x
+
+    def _at_most_one(self, literals):
+        """Asserts at most one literal is true with a sequential counter.
+
+        Uses n - 1 auxiliary variables and about 3n clauses instead of the
+        n ** 2 / 2 pairwise exclusions.
+        """
+        previous = None
+        for i, x in enumerate(literals):
+            if previous is not None:
+                self.solver.add_clause([-x, -previous])
+            if i == len(literals) - 1:
+                break
+            current = self.solver.new_var()
+            self.solver.add_clause([-x, current])
+            if previous is not None:
+                self.solver.add_clause([-previous, current])
+            previous = current
+
+    def _counter(self, literals, k):
+        """Returns literals meaning "at least j are true" for j = 1..k.
+
+        Sequential counter with both directions defined, so it can be used
+        under negation: at_least[i][j] = at_least[i - 1][j] or
+        (x_i and at_least[i - 1][j - 1]).
+        """
+        counts = []
+        for x in literals:
+            current = []
+            for j in range(min(len(counts) + 1, k)):
+                carry = x if j == 0 else self._gate([x, counts[j - 1]])
+                if j < len(counts):
+                    carry = -self._gate([-counts[j], -carry])
+                current.append(carry)
+            counts = current
+        return counts
+
+    def _cardinality(self, sentence):
+        """Returns a literal equivalent to a cardinality constraint."""
+        literals = [self.literal(operand) for operand in sentence.operands]
+        n = len(literals)
+        low, high = sentence.low, sentence.high
+        counts = self._counter(literals, min(n, max(low, high + 1)))
+        parts = []
+        if low > n:
+            parts.append(-self._true())
+        elif low > 0:
+            parts.append(counts[low - 1])
+        if high < n:
+            parts.append(-counts[high])
+        return self._gate(parts)
+
+    def _true(self):
+        if self.true is None:
+            self.true = self.solver.new_var()
+            self.solver.add_clause([self.true])
+        return self.true
+
+
+class KnowledgeBase():
+    """Knowledge base that keeps its solver state between calls.
+
+    The clause database, learned clauses and Tseitin definitions persist
+    across `add` and queries, so each new sentence only adds its own
+    clauses. Entailed answers are cached and survive additions, since
+    adding knowledge never retracts an entailment. `push` and `pop` open and
+    close frames for what-if reasoning: a frame's sentences are guarded by a
+    selector variable assumed true while the frame is open and asserted
+    false once it is popped.
+    """
+
+    def __init__(self, *sentences):
+        self.encoder = Encoder()
+        self.solver = self.encoder.solver
+        self.sentences = []
+        self.frames = []
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base (or the open frame)."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        if self.frames:
+            selector = self.frames[-1][0]
+            self.solver.add_clause([-selector, self.encoder.literal(sentence)])
+        else:
+            self.encoder.add(sentence)
+
+        # Non-entailed answers may change, entailed ones cannot
+        self.cache = {query: answer for query, answer in self.cache.items()
+                      if answer}
+
+    def push(self):
+        """Opens a frame whose additions the matching pop undoes."""
+        self.frames.append(
+            (self.solver.new_var(), len(self.sentences), dict(self.cache))
+        )
+
+    def pop(self):
+        """Closes the innermost frame, retracting its sentences."""
+        selector, size, cache = self.frames.pop()
+        self.solver.add_clause([-selector])
+        del self.sentences[size:]
+        self.cache = cache
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        return self.entails_many([query])[0]
+
+    def entails_many(self, queries):
+        """Checks which queries the knowledge base entails."""
+        pending = [query for query in dict.fromkeys(queries)
+                   if query not in self.cache]
+        self.hits += len(queries) - len(pending)
+        self.misses += len(pending)
+        if pending:
+            entailed = backbone(
+                self.solver,
+                [self.encoder.literal(query) for query in pending],
+                [frame[0] for frame in self.frames]
+            )
+            self.cache.update(zip(pending, entailed))
+        return [self.cache[query] for query in queries]
+
+    def check_symbols(self, symbols):
+        """Maps each symbol to True or False if entailed, otherwise None."""
+        queries = []
+        for symbol in symbols:
+            queries.extend([symbol, Not(symbol)])
+        entailed = self.entails_many(queries)
+
+        result = {}
+        for i, symbol in enumerate(symbols):
+            if entailed[2 * i]:
+                result[symbol] = True
+            elif entailed[2 * i + 1]:
+                result[symbol] = False
+            else:
+                result[symbol] = None
+        return result
+
+
+def luby(i):
+    """Returns the i-th element (from 0) of the Luby restart sequence."""
+    size, exponent = 1, 0
+    while size < i + 1:
+        exponent += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        exponent -= 1
+        i = i % size
+    return 2 ** exponent
+
+
+def entails(knowledge, query):
+    """Checks if knowledge entails query by refuting knowledge ^ ¬query."""
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return not encoder.solver.solve([-encoder.literal(query)])
+
+
+def backbone(solver, literals, assumptions=()):
+    """Returns which literals hold in every model of the solver's clauses.
+
+    Only models satisfying the assumption literals are considered. Each
+    model found rules out every literal it falsifies, so most literals are
+    settled without a solver call of their own.
+    """
+    assumptions = list(assumptions)
+    if not solver.solve(assumptions):
+        return [True] * len(literals)
+
+    entailed = [None] * len(literals)
+    pending = set(range(len(literals)))
+
+    def refute(model):
+        for i in list(pending):
+            if model[abs(literals[i])] != (literals[i] > 0):
+                entailed[i] = False
+                pending.discard(i)
+
+    refute(solver.model)
+    while pending:
+        i = pending.pop()
+        if solver.solve(assumptions + [-literals[i]]):
+            entailed[i] = False
+            refute(solver.model)
+        else:
+            entailed[i] = True
+            if not assumptions:
+                solver.add_clause([literals[i]])
+    return entailed
+
+
+def entails_many(knowledge, queries):
+    """Checks which queries knowledge entails, sharing one solver."""
+    encoder = Encoder()
+    encoder.add(knowledge)
+    return backbone(encoder.solver,
+                    [encoder.literal(query) for query in queries])
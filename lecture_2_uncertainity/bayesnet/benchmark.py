@@ -0,0 +1,172 @@
+import time
+
+import numpy as np
+
+from elimination import VariableElimination
+
+
+def write_csv(data, names):
+    """Writes coded observations to a temporary CSV file, returning its name."""
+    import tempfile
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+        f.write(",".join(names) + "\n")
+        np.savetxt(f, data, fmt="%d", delimiter=",")
+    return f.name
+
+
+def benchmark_sampling():
+    """Times vectorized rejection sampling against the exact answer."""
+    from sampling import ForwardSampler
+
+    print("rejection sampling: appointment given train delayed")
+    exact = VariableElimination().predict_proba({"train": "delayed"})[3]
+    print(f"  exact    attend {exact['attend']:.4f}")
+    sampler = ForwardSampler(seed=0)
+    for n in [10 ** 4, 10 ** 6, 10 ** 7]:
+        start = time.perf_counter()
+        counts = sampler.rejection("appointment", {"train": "delayed"}, n)
+        elapsed = time.perf_counter() - start
+        attend = counts["attend"] / sum(counts.values())
+        print(f"  N={n:<9} attend {attend:.4f} in {elapsed:.4f}s,",
+              f"{n / elapsed:,.0f} samples/s")
+
+
+def benchmark_weighting():
+    """Compares samplers reaching the same precision on rare evidence."""
+    from sampling import GibbsSampler, LikelihoodWeighting, estimate
+
+    evidence = {"train": "delayed", "rain": "heavy"}
+    print("maintenance given train delayed and heavy rain, to ± 0.002")
+    exact = VariableElimination().predict_proba(evidence)[1]
+    print(f"  exact               yes {exact['yes']:.4f}")
+    for label, estimator in [
+        ("likelihood weighting", LikelihoodWeighting("maintenance", evidence,
+                                                     seed=0)),
+        ("gibbs", GibbsSampler("maintenance", evidence, seed=0))
+    ]:
+        start = time.perf_counter()
+        posterior, error = estimate(estimator, precision=0.002, budget=30)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<20} yes {posterior['yes']:.4f}",
+              f"± {error['yes']:.4f} from {estimator.samples} samples",
+              f"in {elapsed:.4f}s")
+
+
+def benchmark_scoring():
+    """Times bulk log-likelihood scoring in memory and from a CSV file."""
+    import os
+
+    from sampling import ForwardSampler
+    from scoring import LogLikelihood, score_csv
+
+    print("log-likelihood scoring: rows per second")
+    scorer = LogLikelihood()
+    data = ForwardSampler(seed=0).sample(10 ** 6)
+    start = time.perf_counter()
+    scorer.score(data)
+    elapsed = time.perf_counter() - start
+    print(f"  in memory {len(data) / elapsed:,.0f} rows/s")
+
+    filename = write_csv(data, scorer.network.names)
+    try:
+        start = time.perf_counter()
+        rows = sum(len(scores) for scores in score_csv(filename))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.remove(filename)
+    print(f"  from csv  {rows / elapsed:,.0f} rows/s")
+
+
+def benchmark_learning():
+    """Times learning the CPTs back from sampled observations."""
+    import os
+
+    from learning import Counts, learn_csv
+    from sampling import ForwardSampler
+
+    print("learning CPTs: rows per second")
+    sampler = ForwardSampler(seed=0)
+    data = sampler.sample(10 ** 6)
+    counts = Counts(sampler.network)
+    start = time.perf_counter()
+    counts.update(data)
+    elapsed = time.perf_counter() - start
+    print(f"  in memory {len(data) / elapsed:,.0f} rows/s")
+
+    filename = write_csv(data, sampler.network.names)
+    try:
+        processes = 1
+        while processes <= os.cpu_count():
+            start = time.perf_counter()
+            counts = learn_csv(filename, processes=processes)
+            elapsed = time.perf_counter() - start
+            print(f"  from csv, {processes:<3} workers",
+                  f"{counts.rows / elapsed:,.0f} rows/s")
+            processes *= 2
+    finally:
+        os.remove(filename)
+    error = max(
+        np.abs(counts.cpts(alpha=1)[name] - sampler.network.cpts[name]).max()
+        for name in sampler.network.names
+    )
+    print(f"  largest error in the learned CPTs {error:.4f}")
+
+
+def benchmark_junction():
+    """Times repeated evidence queries on a compiled junction tree."""
+    import random
+
+    from junction import JunctionTree
+
+    print("junction tree: repeated queries with varying evidence")
+    ve = VariableElimination()
+    tree = JunctionTree()
+    shapes = [{"train": value} for value in ["on time", "delayed"]] + [
+        {"rain": rain, "appointment": appointment}
+        for rain in ["none", "light", "heavy"]
+        for appointment in ["attend", "miss"]
+    ]
+    queries = [random.Random(i).choice(shapes) for i in range(10000)]
+    start = time.perf_counter()
+    for evidence in queries[:1000]:
+        ve.predict_proba(evidence)
+    elapsed = (time.perf_counter() - start) / 1000
+    print(f"  variable elimination {elapsed * 1e6:.1f}us per query")
+    for evidence in queries:
+        tree.predict_proba(evidence)
+    stats = tree.stats()
+    print(f"  junction tree compiled in {stats['compile_time'] * 1e3:.2f}ms,",
+          f"{stats['mean_latency'] * 1e6:.1f}us per query,",
+          f"hit rate {stats['hit_rate']:.3f}")
+
+
+def benchmark_loading():
+    """Times loading the network from .npz against building it."""
+    import os
+    import tempfile
+
+    from factor import Network
+
+    print("model loading: milliseconds")
+    start = time.perf_counter()
+    network = Network()
+    print(f"  from network.py {(time.perf_counter() - start) * 1e3:.3f}ms")
+    filename = os.path.join(tempfile.mkdtemp(), "network.npz")
+    network.save(filename)
+    try:
+        start = time.perf_counter()
+        Network.load(filename)
+        print(f"  from .npz       {(time.perf_counter() - start) * 1e3:.3f}ms")
+    finally:
+        os.remove(filename)
+        os.rmdir(os.path.dirname(filename))
+
+
+if __name__ == "__main__":
+    benchmark_sampling()
+    benchmark_weighting()
+    benchmark_scoring()
+    benchmark_junction()
+    benchmark_learning()
+    benchmark_loading()
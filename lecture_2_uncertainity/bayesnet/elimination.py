@@ -0,0 +1,91 @@
+from factor import Network, product
+
+
+def moral_graph(network):
+    """Links each node to its parents and parents of a shared child."""
+    graph = {name: set() for name in network.names}
+    for name in network.names:
+        family = network.parents[name] + [name]
+        for a in family:
+            for b in family:
+                if a != b:
+                    graph[a].add(b)
+    return graph
+
+
+def min_fill_order(network):
+    """Orders every node for elimination, greedily by fewest fill-in edges.
+
+    Ties go to the node with the fewest neighbors, then to network order.
+    """
+    graph = {name: set(neighbors)
+             for name, neighbors in moral_graph(network).items()}
+    position = {name: i for i, name in enumerate(network.names)}
+    order = []
+    while graph:
+
+        def fill(name):
+            neighbors = list(graph[name])
+            return sum(
+                b not in graph[a]
+                for i, a in enumerate(neighbors)
+                for b in neighbors[i + 1:]
+            )
+
+        name = min(graph, key=lambda n: (fill(n), len(graph[n]), position[n]))
+        neighbors = graph.pop(name)
+        for a in neighbors:
+            graph[a].discard(name)
+            graph[a].update(neighbors - {a})
+        order.append(name)
+    return order
+
+
+class VariableElimination():
+    """Exact inference on a Network by variable elimination.
+
+    The min-fill elimination order is computed once for the whole network
+    and reused by every query, skipping the query and evidence variables.
+    """
+
+    def __init__(self, network=None):
+        self.network = network or Network()
+        self.order = min_fill_order(self.network)
+
+    def query(self, variables, evidence=None):
+        """Returns the normalized joint factor of variables given evidence.
+
+        Evidence maps node names to values, as in pomegranate.
+        """
+        evidence = self.network.encode(evidence or {})
+        factors = [factor.reduce(evidence) for factor in self.network.factors()]
+        for name in self.order:
+            if name in evidence or name in variables:
+                continue
+            involved = [f for f in factors if name in f.variables]
+            if not involved:
+                continue
+            factors = [f for f in factors if name not in f.variables]
+            keep = []
+            for factor in involved:
+                for v in factor.variables:
+                    if v != name and v not in keep:
+                        keep.append(v)
+            factors.append(product(involved, keep))
+        return product(factors, list(variables)).normalize()
+
+    def predict_proba(self, evidence=None):
+        """Returns the observed value or a distribution for every node.
+
+        Like pomegranate's predict_proba, in network order, with each
+        distribution a dict from value to probability.
+        """
+        evidence = evidence or {}
+        predictions = []
+        for name in self.network.names:
+            if name in evidence:
+                predictions.append(evidence[name])
+                continue
+            table = self.query([name], evidence).table.tolist()
+            predictions.append(dict(zip(self.network.values[name], table)))
+        return predictions
@@ -0,0 +1,161 @@
+import string
+
+import numpy as np
+
+from network import network
+
+
+class Network():
+    """Integer-coded form of a network spec, with one CPT array per node.
+
+    Values of each node are numbered in order of first appearance in its
+    table. The CPT of a node has one axis per parent, in order, then one
+    for the node itself.
+    """
+
+    def __init__(self, spec=network):
+        self.names = list(spec)
+        self.parents = {name: list(spec[name]["parents"]) for name in spec}
+        self.values = {}
+        for name in self.names:
+            values = []
+            for row in spec[name]["probabilities"]:
+                if row[-2] not in values:
+                    values.append(row[-2])
+            self.values[name] = values
+        self.index = {
+            name: {value: i for i, value in enumerate(values)}
+            for name, values in self.values.items()
+        }
+
+        self.cpts = {}
+        for name in self.names:
+            family = self.parents[name] + [name]
+            table = np.zeros([len(self.values[node]) for node in family])
+            for row in spec[name]["probabilities"]:
+                position = tuple(
+                    self.index[node][value] for node, value in zip(family, row)
+                )
+                table[position] = row[-1]
+            self.cpts[name] = table
+
+    def cardinality(self, name):
+        return len(self.values[name])
+
+    def factors(self):
+        """Returns one factor per node, over the node and its parents."""
+        return [
+            Factor(self.parents[name] + [name], self.cpts[name])
+            for name in self.names
+        ]
+
+    def save(self, filename):
+        """Writes the network to a .npz file that load reads back.
+
+        Holds the node names, each node's values, parent indices and CPT.
+        """
+        arrays = {"kind": np.array("bayesnet"), "names": np.array(self.names)}
+        for i, name in enumerate(self.names):
+            arrays[f"parents{i}"] = np.array(
+                [self.names.index(parent) for parent in self.parents[name]],
+                dtype=np.int64
+            )
+            arrays[f"values{i}"] = np.array(self.values[name])
+            arrays[f"cpt{i}"] = self.cpts[name]
+        np.savez(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        """Reads a network written by save, without rebuilding any tables."""
+        network = cls.__new__(cls)
+        with np.load(filename, mmap_mode="r") as f:
+            if f["kind"] != "bayesnet":
+                raise ValueError(f"{filename} does not hold a network")
+            network.names = f["names"].tolist()
+            network.parents = {}
+            network.values = {}
+            network.cpts = {}
+            for i, name in enumerate(network.names):
+                network.parents[name] = [
+                    network.names[j] for j in f[f"parents{i}"]
+                ]
+                network.values[name] = f[f"values{i}"].tolist()
+                network.cpts[name] = f[f"cpt{i}"]
+        network.index = {
+            name: {value: i for i, value in enumerate(values)}
+            for name, values in network.values.items()
+        }
+        return network
+
+    def encode(self, evidence):
+        """Maps evidence values to their integer codes."""
+        try:
+            return {
+                name: self.index[name][value]
+                for name, value in evidence.items()
+            }
+        except KeyError as error:
+            raise ValueError(f"unknown node or value {error}") from None
+
+
+class Factor():
+    """A table over named variables, with one numpy axis per variable."""
+
+    def __init__(self, variables, table):
+        self.variables = tuple(variables)
+        self.table = np.asarray(table, dtype=float)
+
+    def __repr__(self):
+        return f"Factor({self.variables}, {self.table.tolist()})"
+
+    def __mul__(self, other):
+        return product([self, other])
+
+    def sum_out(self, *variables):
+        """Marginalizes variables out of the factor."""
+        keep = [v for v in self.variables if v not in variables]
+        return product([self], keep)
+
+    def reduce(self, evidence):
+        """Fixes the variables in evidence, dropping their axes."""
+        if not any(v in evidence for v in self.variables):
+            return self
+        position = tuple(
+            evidence[v] if v in evidence else slice(None)
+            for v in self.variables
+        )
+        return Factor(
+            [v for v in self.variables if v not in evidence],
+            self.table[position]
+        )
+
+    def normalize(self):
+        total = self.table.sum()
+        if total == 0:
+            raise ValueError("evidence has probability zero")
+        return Factor(self.variables, self.table / total)
+
+
+def product(factors, keep=None):
+    """Multiplies factors and sums out every variable not in keep.
+
+    Both steps happen in a single einsum, so the full product table is never
+    built when variables are summed out. By default all variables are kept.
+    """
+    variables = []
+    for factor in factors:
+        for v in factor.variables:
+            if v not in variables:
+                variables.append(v)
+    if keep is None:
+        keep = variables
+    letters = dict(zip(variables, string.ascii_letters))
+    if len(letters) < len(variables):
+        raise ValueError("too many variables for one product")
+
+    inputs = ",".join(
+        "".join(letters[v] for v in factor.variables) for factor in factors
+    )
+    output = "".join(letters[v] for v in keep)
+    operands = [factor.table for factor in factors]
+    return Factor(keep, np.einsum(f"{inputs}->{output}", *operands))
@@ -1,4 +1,11 @@
-from model import model
+from elimination import VariableElimination
+
+# Exact inference with numpy factors, see elimination.py. model.py's
+# predict_proba runs loopy belief propagation, which is approximate here
+# since rain reaches train directly and through maintenance, so its
+# predictions differ slightly (rain none 0.4581 rather than 0.4601 given
+# train delayed)
+model = VariableElimination()
 
 # Calculate predictions 
 #evidence variable
@@ -8,10 +15,10 @@ predictions = model.predict_proba({
 })
 
 # Print predictions for each node
-for node, prediction in zip(model.states, predictions):
+for node, prediction in zip(model.network.names, predictions):
     if isinstance(prediction, str):
-        print(f"{node.name}: {prediction}")
+        print(f"{node}: {prediction}")
     else:
-        print(f"{node.name}")
-        for value, probability in prediction.parameters[0].items():
+        print(f"{node}")
+        for value, probability in prediction.items():
             print(f"    {value}: {probability:.4f}")
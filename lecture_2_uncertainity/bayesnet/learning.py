@@ -0,0 +1,141 @@
+import concurrent.futures
+import itertools
+import os
+
+import numpy as np
+
+from factor import Network
+from scoring import CHUNK_SIZE, read_csv
+
+
+class Counts():
+    """Counts of each node's value for each configuration of its parents.
+
+    Each node's counts have the shape of its CPT. A chunk of rows is
+    counted with one bincount per node over flattened family indices, and
+    counts from separate chunks, files or processes add with merge.
+    """
+
+    def __init__(self, network=None):
+        self.network = network or Network()
+        self.counts = {
+            name: np.zeros(self.network.cpts[name].shape, dtype=np.int64)
+            for name in self.network.names
+        }
+        self.families = {
+            name: [self.network.names.index(parent)
+                   for parent in self.network.parents[name]] + [column]
+            for column, name in enumerate(self.network.names)
+        }
+        self.rows = 0
+
+    def update(self, data):
+        """Counts an (N, nodes) array of value codes in network order."""
+        data = np.asarray(data)
+        for name in self.network.names:
+            counts = self.counts[name]
+            family = data[:, self.families[name]].astype(np.intp)
+            index = np.ravel_multi_index(family.T, counts.shape)
+            counts += np.bincount(index, minlength=counts.size).reshape(
+                counts.shape
+            )
+        self.rows += len(data)
+
+    def merge(self, other):
+        """Adds the counts of other into these."""
+        for name in self.network.names:
+            self.counts[name] += other.counts[name]
+        self.rows += other.rows
+        return self
+
+    def cpts(self, alpha=0):
+        """Returns the estimated CPT arrays.
+
+        With alpha 0 these are maximum-likelihood estimates; otherwise
+        alpha pseudo-counts are added to every entry, the mean of a
+        symmetric Dirichlet posterior. Parent configurations never seen
+        get a uniform distribution.
+        """
+        cpts = {}
+        for name in self.network.names:
+            counts = self.counts[name] + alpha
+            totals = counts.sum(axis=-1, keepdims=True)
+            uniform = np.full(counts.shape, 1 / counts.shape[-1])
+            with np.errstate(invalid="ignore", divide="ignore"):
+                cpts[name] = np.where(totals > 0, counts / totals, uniform)
+        return cpts
+
+    def spec(self, alpha=0):
+        """Returns the estimates as a spec in the format of network.py."""
+        cpts = self.cpts(alpha)
+        spec = {}
+        for name in self.network.names:
+            family = self.network.parents[name] + [name]
+            rows = []
+            for position in itertools.product(
+                *[range(self.network.cardinality(node)) for node in family]
+            ):
+                values = [self.network.values[node][i]
+                          for node, i in zip(family, position)]
+                rows.append(values + [float(cpts[name][position])])
+            spec[name] = {
+                "parents": list(self.network.parents[name]),
+                "probabilities": rows
+            }
+        return spec
+
+
+def read_range(filename, start, end):
+    """Yields the lines of a file that begin at bytes start to end."""
+    with open(filename, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                return
+            position += len(line)
+            yield line.decode()
+
+
+def count_range(filename, start, end, network=None, chunk_size=CHUNK_SIZE):
+    """Counts the rows of a CSV file that begin at bytes start to end."""
+    counts = Counts(network)
+    with open(filename) as f:
+        header = f.readline()
+    lines = itertools.chain([header], read_range(filename, start, end))
+    for data in read_csv(lines, counts.network, chunk_size):
+        counts.update(data)
+    return counts
+
+
+def learn_csv(filename, network=None, processes=None, chunk_size=CHUNK_SIZE):
+    """Counts a CSV file of observations, splitting it across processes.
+
+    The file is cut into one byte range per process, each counted by a
+    worker in chunks, and the partial counts are merged. Call spec or cpts
+    on the result for the estimates.
+    """
+    network = network or Network()
+    processes = processes or os.cpu_count()
+    with open(filename, "rb") as f:
+        f.readline()
+        begin = f.tell()
+    size = os.path.getsize(filename)
+    bounds = np.linspace(begin, size, processes + 1).astype(int).tolist()
+
+    counts = Counts(network)
+    if processes == 1:
+        return counts.merge(count_range(filename, begin, size, network,
+                                        chunk_size))
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        futures = [
+            executor.submit(count_range, filename, start, end, network,
+                            chunk_size)
+            for start, end in zip(bounds, bounds[1:])
+        ]
+        for future in futures:
+            counts.merge(future.result())
+    return counts
@@ -1,6 +1,13 @@
-from model import model
+import numpy as np
+
+from scoring import LogLikelihood
+
+# Score observations with numpy lookup tables, see scoring.py;
+# model.probability from model.py gives the same probability
+model = LogLikelihood()
 
 # Calculate probability for a given observation
-probability = model.probability([["none", "no", "on time", "attend"]]) #find probability of this sample
+data = model.encode([["none", "no", "on time", "attend"]])
+probability = np.exp(model.score(data))[0] #find probability of this sample
 
 print(probability)
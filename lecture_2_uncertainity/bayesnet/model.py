@@ -1,56 +1,38 @@
 from pomegranate import *
 
+from network import network
+
 """Distribution accorfing to the no of edges coming"""
-# Rain node has no parents
-rain = Node(DiscreteDistribution({
-    "none": 0.7,
-    "light": 0.2,
-    "heavy": 0.1
-}), name="rain")
-
-# Track maintenance node is conditional on rain
-maintenance = Node(ConditionalProbabilityTable([
-    ["none", "yes", 0.4],
-    ["none", "no", 0.6],
-    ["light", "yes", 0.2],
-    ["light", "no", 0.8],
-    ["heavy", "yes", 0.1],
-    ["heavy", "no", 0.9]
-], [rain.distribution]), name="maintenance")
-
-# Train node is conditional on rain and maintenance
-train = Node(ConditionalProbabilityTable([
-    ["none", "yes", "on time", 0.8],
-    ["none", "yes", "delayed", 0.2],
-    ["none", "no", "on time", 0.9],
-    ["none", "no", "delayed", 0.1],
-    ["light", "yes", "on time", 0.6],
-    ["light", "yes", "delayed", 0.4],
-    ["light", "no", "on time", 0.7],
-    ["light", "no", "delayed", 0.3],
-    ["heavy", "yes", "on time", 0.4],
-    ["heavy", "yes", "delayed", 0.6],
-    ["heavy", "no", "on time", 0.5],
-    ["heavy", "no", "delayed", 0.5],
-], [rain.distribution, maintenance.distribution]), name="train")
-
-# Appointment node is conditional on train
-appointment = Node(ConditionalProbabilityTable([
-    ["on time", "attend", 0.9],
-    ["on time", "miss", 0.1],
-    ["delayed", "attend", 0.6],
-    ["delayed", "miss", 0.4]
-], [train.distribution]), name="appointment")
+nodes = {}
+for name, spec in network.items():
+
+    # Root nodes have a plain distribution
+    if not spec["parents"]:
+        distribution = DiscreteDistribution({
+            value: probability for value, probability in spec["probabilities"]
+        })
+
+    # Other nodes are conditional on their parents
+    else:
+        distribution = ConditionalProbabilityTable(
+            spec["probabilities"],
+            [nodes[parent].distribution for parent in spec["parents"]]
+        )
+    nodes[name] = Node(distribution, name=name)
+
+rain = nodes["rain"]
+maintenance = nodes["maintenance"]
+train = nodes["train"]
+appointment = nodes["appointment"]
 
 # Create a Bayesian Network and add states
 model = BayesianNetwork()
-model.add_states(rain, maintenance, train, appointment)
+model.add_states(*nodes.values())
 
 # Add edges connecting nodes
-model.add_edge(rain, maintenance)
-model.add_edge(rain, train)
-model.add_edge(maintenance, train)
-model.add_edge(train, appointment)
+for name, spec in network.items():
+    for parent in spec["parents"]:
+        model.add_edge(nodes[parent], nodes[name])
 
 # Finalize model
 model.bake()
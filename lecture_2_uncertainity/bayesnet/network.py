@@ -0,0 +1,59 @@
+# Plain description of the network, shared by model.py and the numpy code
+
+# Each node lists its parents and the rows of its probability table, in
+# topological order. A row gives the parents' values, the node's value and
+# its probability, as in pomegranate's ConditionalProbabilityTable
+network = {
+    # Rain node has no parents
+    "rain": {
+        "parents": [],
+        "probabilities": [
+            ["none", 0.7],
+            ["light", 0.2],
+            ["heavy", 0.1]
+        ]
+    },
+
+    # Track maintenance node is conditional on rain
+    "maintenance": {
+        "parents": ["rain"],
+        "probabilities": [
+            ["none", "yes", 0.4],
+            ["none", "no", 0.6],
+            ["light", "yes", 0.2],
+            ["light", "no", 0.8],
+            ["heavy", "yes", 0.1],
+            ["heavy", "no", 0.9]
+        ]
+    },
+
+    # Train node is conditional on rain and maintenance
+    "train": {
+        "parents": ["rain", "maintenance"],
+        "probabilities": [
+            ["none", "yes", "on time", 0.8],
+            ["none", "yes", "delayed", 0.2],
+            ["none", "no", "on time", 0.9],
+            ["none", "no", "delayed", 0.1],
+            ["light", "yes", "on time", 0.6],
+            ["light", "yes", "delayed", 0.4],
+            ["light", "no", "on time", 0.7],
+            ["light", "no", "delayed", 0.3],
+            ["heavy", "yes", "on time", 0.4],
+            ["heavy", "yes", "delayed", 0.6],
+            ["heavy", "no", "on time", 0.5],
+            ["heavy", "no", "delayed", 0.5]
+        ]
+    },
+
+    # Appointment node is conditional on train
+    "appointment": {
+        "parents": ["train"],
+        "probabilities": [
+            ["on time", "attend", 0.9],
+            ["on time", "miss", 0.1],
+            ["delayed", "attend", 0.6],
+            ["delayed", "miss", 0.4]
+        ]
+    }
+}
@@ -0,0 +1,254 @@
+import collections
+import time
+
+import numpy as np
+
+from factor import Network
+
+# Samples drawn at once by rejection sampling, bounding memory
+CHUNK_SIZE = 1000000
+
+
+class ForwardSampler():
+    """Draws whole columns of samples from a Network at once.
+
+    A batch is an (N, nodes) int8 array of value codes, with columns in
+    network order. Each node is sampled for every row in one step: roots
+    by searchsorted on their cumulative table, other nodes by gathering
+    the cumulative row selected by their parents' codes.
+    """
+
+    def __init__(self, network=None, seed=None):
+        self.network = network or Network()
+        self.rng = np.random.default_rng(seed)
+        self.columns = {name: i for i, name in enumerate(self.network.names)}
+
+        # Cumulative tables, one row per combination of parent values
+        self.cumulative = {}
+        for name in self.network.names:
+            cpt = self.network.cpts[name]
+            rows = np.cumsum(cpt.reshape(-1, cpt.shape[-1]), axis=1)
+            self.cumulative[name] = rows
+
+    def sample(self, n, evidence=None):
+        """Returns n samples as an (n, nodes) int8 array.
+
+        Nodes in evidence, a mapping of names to values, are clamped to
+        their observed value instead of sampled.
+        """
+        codes = self.network.encode(evidence or {})
+        samples = np.empty((n, len(self.network.names)), dtype=np.int8)
+        for column, name in enumerate(self.network.names):
+            if name in codes:
+                samples[:, column] = codes[name]
+                continue
+            rows = self.cumulative[name]
+            last = rows.shape[1] - 1
+            u = self.rng.random(n)
+            if not self.network.parents[name]:
+                values = np.searchsorted(rows[0], u, side="right")
+            else:
+                values = (u[:, np.newaxis] >= rows[self.row(samples, name)]
+                          ).sum(axis=1)
+
+            # Rounding can leave the last cumulative value just below 1
+            samples[:, column] = np.minimum(values, last)
+        return samples
+
+    def row(self, samples, name):
+        """Returns each sample's row of name's CPT, from its parents' codes."""
+        parents = self.network.parents[name]
+        if not parents:
+            return np.zeros(len(samples), dtype=np.intp)
+        return np.ravel_multi_index(
+            tuple(samples[:, self.columns[p]] for p in parents),
+            self.network.cpts[name].shape[:-1]
+        )
+
+    def probability(self, samples, name):
+        """Returns P(name | parents) for the values in each sample."""
+        cpt = self.network.cpts[name]
+        rows = cpt.reshape(-1, cpt.shape[-1])
+        return rows[self.row(samples, name), samples[:, self.columns[name]]]
+
+    def rejection(self, query, evidence, n, chunk_size=CHUNK_SIZE):
+        """Counts values of query in the samples that agree with evidence.
+
+        Draws n samples in chunks so memory stays flat for any n.
+        """
+        codes = self.network.encode(evidence)
+        column = self.columns[query]
+        counts = np.zeros(self.network.cardinality(query), dtype=np.int64)
+        for start in range(0, n, chunk_size):
+            samples = self.sample(min(chunk_size, n - start))
+            mask = np.ones(len(samples), dtype=bool)
+            for name, code in codes.items():
+                mask &= samples[:, self.columns[name]] == code
+            counts += np.bincount(samples[mask, column],
+                                  minlength=len(counts))
+        return collections.Counter({
+            value: int(count)
+            for value, count in zip(self.network.values[query], counts)
+            if count
+        })
+
+
+class LikelihoodWeighting():
+    """Estimates P(query | evidence) from weighted forward samples.
+
+    Evidence nodes are clamped and each particle weighted by the
+    probability of the evidence given its sampled parents, so no sample is
+    rejected however unlikely the evidence.
+    """
+
+    def __init__(self, query, evidence, particles=100000, network=None,
+                 seed=None):
+        self.sampler = ForwardSampler(network, seed)
+        self.network = self.sampler.network
+        self.query = query
+        self.evidence = evidence
+        self.particles = particles
+        self.column = self.sampler.columns[query]
+        size = self.network.cardinality(query)
+
+        # Sums of weights and squared weights, overall and per query value
+        self.weights = np.zeros(size)
+        self.squares = np.zeros(size)
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.samples = 0
+
+    def step(self):
+        """Draws one batch of particles."""
+        samples = self.sampler.sample(self.particles, self.evidence)
+        weights = np.ones(self.particles)
+        for name in self.evidence:
+            weights *= self.sampler.probability(samples, name)
+        values = samples[:, self.column]
+        size = len(self.weights)
+        self.weights += np.bincount(values, weights, minlength=size)
+        self.squares += np.bincount(values, weights ** 2, minlength=size)
+        self.total += weights.sum()
+        self.total_squares += (weights ** 2).sum()
+        self.samples += self.particles
+
+    def posterior(self):
+        if self.total == 0:
+            return np.full(len(self.weights), np.nan)
+        return self.weights / self.total
+
+    def standard_error(self):
+        """Delta-method standard error of the self-normalized estimate."""
+        if self.total == 0:
+            return np.full(len(self.weights), np.inf)
+        p = self.posterior()
+        variance = (self.squares * (1 - 2 * p)
+                    + p ** 2 * self.total_squares) / self.total ** 2
+        return np.sqrt(np.maximum(variance, 0))
+
+
+class GibbsSampler():
+    """Estimates P(query | evidence) with many Gibbs chains in lockstep.
+
+    Each sweep resamples every hidden node of every chain from its
+    distribution given its Markov blanket, one numpy step per node. Chains
+    start from likelihood-weighted particles and run burn_in sweeps before
+    counting. The standard error treats each chain's average
+    as one independent draw, so correlation within a chain is accounted for.
+    """
+
+    def __init__(self, query, evidence, chains=1000, burn_in=100,
+                 network=None, seed=None):
+        self.sampler = ForwardSampler(network, seed)
+        self.network = self.sampler.network
+        self.query = query
+        self.column = self.sampler.columns[query]
+        self.hidden = [name for name in self.network.names
+                       if name not in evidence]
+        self.children = {
+            name: [child for child in self.network.names
+                   if name in self.network.parents[child]]
+            for name in self.network.names
+        }
+
+        # Resample weighted particles so every chain starts consistent
+        particles = self.sampler.sample(chains, evidence)
+        weights = np.ones(chains)
+        for name in evidence:
+            weights *= self.sampler.probability(particles, name)
+        if weights.sum() == 0:
+            raise ValueError("no consistent starting state found")
+        self.state = particles[
+            self.sampler.rng.choice(chains, chains, p=weights / weights.sum())
+        ]
+        for _ in range(burn_in):
+            self.sweep()
+        self.counts = np.zeros((chains, self.network.cardinality(query)))
+        self.samples = 0
+
+    def sweep(self):
+        """Resamples each hidden node once in every chain."""
+        chains = len(self.state)
+        for name in self.hidden:
+            column = self.sampler.columns[name]
+            size = self.network.cardinality(name)
+            weights = np.empty((chains, size))
+            for value in range(size):
+                self.state[:, column] = value
+                weight = self.sampler.probability(self.state, name)
+                for child in self.children[name]:
+                    weight = weight * self.sampler.probability(self.state,
+                                                               child)
+                weights[:, value] = weight
+            cumulative = np.cumsum(weights, axis=1)
+            u = self.sampler.rng.random(chains) * cumulative[:, -1]
+            values = (u[:, np.newaxis] >= cumulative).sum(axis=1)
+            self.state[:, column] = np.minimum(values, size - 1)
+
+    def step(self):
+        """Runs one sweep and counts the query value of every chain."""
+        self.sweep()
+        chains = np.arange(len(self.state))
+        self.counts[chains, self.state[:, self.column]] += 1
+        self.samples += len(self.state)
+
+    def posterior(self):
+        return self.counts.sum(axis=0) / max(self.counts.sum(), 1)
+
+    def standard_error(self):
+        sweeps = self.counts[0].sum()
+        if sweeps == 0 or len(self.counts) < 2:
+            return np.full(self.counts.shape[1], np.inf)
+        averages = self.counts / sweeps
+        return averages.std(axis=0, ddof=1) / np.sqrt(len(self.counts))
+
+
+def estimate(estimator, precision=0.005, budget=None, log=False):
+    """Steps an estimator until it is precise enough or out of time.
+
+    Stops once every standard error is at most precision, or after budget
+    seconds. Returns the posterior and standard error as dicts from query
+    values to numbers. With log, reports the running estimate at every
+    doubling of the number of steps.
+    """
+    start = time.perf_counter()
+    values = estimator.network.values[estimator.query]
+    steps = 0
+    while True:
+        estimator.step()
+        steps += 1
+        error = estimator.standard_error()
+        elapsed = time.perf_counter() - start
+        done = (error <= precision).all() or (
+            budget is not None and elapsed >= budget
+        )
+        if log and (done or steps & (steps - 1) == 0):
+            posterior = ", ".join(
+                f"{value} {p:.4f} ± {e:.4f}"
+                for value, p, e in zip(values, estimator.posterior(), error)
+            )
+            print(f"{estimator.samples} samples, {elapsed:.2f}s: {posterior}")
+        if done:
+            break
+    return (dict(zip(values, estimator.posterior().tolist())),
+            dict(zip(values, error.tolist())))
@@ -0,0 +1,97 @@
+import itertools
+
+import numpy as np
+
+from factor import Network
+
+# Rows read from a CSV file at once, bounding memory
+CHUNK_SIZE = 1000000
+
+
+class LogLikelihood():
+    """Scores observations of every node by their joint log-probability.
+
+    Observations are an (N, nodes) integer array of value codes in network
+    order. Each node's CPT is flattened into a log table once, so scoring
+    is one gather per node and a sum, with no Python loop over rows.
+    """
+
+    def __init__(self, network=None):
+        self.network = network or Network()
+        self.tables = {}
+        with np.errstate(divide="ignore"):
+            for name in self.network.names:
+                self.tables[name] = np.log(self.network.cpts[name]).ravel()
+        self.families = {
+            name: [self.network.names.index(parent)
+                   for parent in self.network.parents[name]] + [column]
+            for column, name in enumerate(self.network.names)
+        }
+        self.shapes = {
+            name: self.network.cpts[name].shape for name in self.network.names
+        }
+
+    def score(self, data):
+        """Returns the joint log-probability of each row of data."""
+        data = np.asarray(data)
+        total = np.zeros(len(data))
+        for name in self.network.names:
+            family = data[:, self.families[name]].astype(np.intp)
+            index = np.ravel_multi_index(family.T, self.shapes[name])
+            total += self.tables[name][index]
+        return total
+
+    def encode(self, rows):
+        """Returns an int8 array of codes for rows of value names.
+
+        Values may also be given as their integer codes.
+        """
+        rows = np.asarray(rows, dtype=str)
+        data = np.empty(rows.shape, dtype=np.int8)
+        for column, name in enumerate(self.network.names):
+            codes = dict(self.network.index[name])
+            codes.update({str(i): i for i in codes.values()})
+            values, inverse = np.unique(np.char.strip(rows[:, column]),
+                                        return_inverse=True)
+            try:
+                lookup = np.array([codes[value] for value in values],
+                                  dtype=np.int8)
+            except KeyError as error:
+                raise ValueError(f"unknown value {error} for {name}") from None
+            data[:, column] = lookup[inverse.ravel()]
+        return data
+
+
+def read_csv(f, network=None, chunk_size=CHUNK_SIZE):
+    """Yields int8 arrays of codes from a CSV file with a header row.
+
+    Columns are matched to nodes by the header and may be in any order;
+    f is an open file or any iterable of lines. Only chunk_size rows are
+    held at once, so files larger than memory stream through.
+    """
+    scorer = LogLikelihood(network)
+    lines = iter(f)
+    header = [name.strip() for name in next(lines).split(",")]
+    try:
+        order = [header.index(name) for name in scorer.network.names]
+    except ValueError:
+        raise ValueError(f"header {header} lacks a node") from None
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+
+        # Blank lines, such as a trailing newline, hold no observation
+        chunk = [line for line in chunk if line.strip()]
+        if not chunk:
+            continue
+        rows = np.loadtxt(chunk, dtype=str, delimiter=",", ndmin=2)
+        yield scorer.encode(rows[:, order])
+
+
+def score_csv(filename, network=None, chunk_size=CHUNK_SIZE):
+    """Yields the log-likelihood of every row of a CSV file, by chunk."""
+    scorer = LogLikelihood(network)
+    with open(filename) as f:
+        for data in read_csv(f, scorer.network, chunk_size):
+            yield scorer.score(data)
@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+
+from chain import Chain
+
+
+def benchmark_simulation():
+    """Times simulating a million chains for a year of days."""
+    print("simulating 1,000,000 chains for 365 steps")
+    chain = Chain.from_parameters()
+    for method in ["cumulative", "alias"]:
+        start = time.perf_counter()
+        paths = chain.simulate(1000000, 365, seed=0, method=method)
+        elapsed = time.perf_counter() - start
+        rain = (paths[:, -1] == chain.index["rain"]).mean()
+        print(f"  {method:<10} {elapsed:.2f}s,",
+              f"{paths.size / elapsed:,.0f} chain steps/s,",
+              f"rain on the last day {rain:.4f}")
+
+
+def benchmark_analytic():
+    """Compares analytic answers with Monte Carlo estimates."""
+    print("analytic queries against simulation")
+    chain = Chain.from_parameters()
+    rain = chain.index["rain"]
+    paths = chain.simulate(100000, 365, seed=0)
+
+    start = time.perf_counter()
+    stationary = chain.stationary()
+    print(f"  stationary rain {stationary[rain]:.4f}",
+          f"in {(time.perf_counter() - start) * 1e3:.3f}ms,",
+          f"simulated {(paths[:, 100:] == rain).mean():.4f}")
+
+    start = time.perf_counter()
+    distribution = chain.distribution(3)
+    print(f"  rain on day 4 {distribution[rain]:.4f}",
+          f"in {(time.perf_counter() - start) * 1e3:.3f}ms,",
+          f"simulated {(paths[:, 3] == rain).mean():.4f}")
+
+    start = time.perf_counter()
+    times = chain.hitting_times(["rain"])
+    sun = paths[:, 0] == chain.index["sun"]
+    first = np.argmax(paths[sun] == rain, axis=1)
+    print(f"  days from sun to rain {times[chain.index['sun']]:.4f}",
+          f"in {(time.perf_counter() - start) * 1e3:.3f}ms,",
+          f"simulated {first.mean():.4f}")
+
+
+if __name__ == "__main__":
+    benchmark_simulation()
+    benchmark_analytic()
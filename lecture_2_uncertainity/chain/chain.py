@@ -0,0 +1,180 @@
+import numpy as np
+
+from parameters import parameters
+
+# Up to this many states, simulate gathers each cumulative column
+SMALL = 8
+
+
+class Chain():
+    """Markov chain with integer-coded states.
+
+    `starts` holds P(first state) and `transitions[i, j]` P(next state j |
+    state i).
+    """
+
+    def __init__(self, states, starts, transitions):
+        self.states = list(states)
+        self.starts = np.asarray(starts, dtype=float)
+        self.transitions = np.asarray(transitions, dtype=float)
+        self.index = {state: i for i, state in enumerate(self.states)}
+
+    @classmethod
+    def from_parameters(cls, spec=parameters):
+        """Builds the chain from a spec in the format of parameters.py."""
+        states = spec["states"]
+        index = {state: i for i, state in enumerate(states)}
+        transitions = np.zeros((len(states), len(states)))
+        for today, tomorrow, probability in spec["transitions"]:
+            transitions[index[today], index[tomorrow]] = probability
+        starts = [spec["starts"].get(state, 0) for state in states]
+        return cls(states, starts, transitions)
+
+    def simulate(self, chains, steps, seed=None, method="cumulative"):
+        """Samples independent paths, returning a (chains, steps) array.
+
+        Every chain advances one step per numpy operation. "cumulative"
+        compares one uniform per chain with the cumulative row of its
+        state: one gather per column for a few states, otherwise a single
+        searchsorted over all rows laid end to end. "alias" uses Walker's
+        alias tables, O(1) per chain and step for any number of states.
+        """
+        rng = np.random.default_rng(seed)
+        size = len(self.states)
+        dtype = np.int8 if size <= 127 else np.int32
+
+        # Filled one step at a time, so each step is a contiguous row
+        paths = np.empty((steps, chains), dtype=dtype)
+        if steps == 0:
+            return paths.T
+        if method == "alias":
+            probabilities, aliases = alias_tables(self.transitions)
+            probabilities = probabilities.ravel()
+            aliases = aliases.ravel()
+        elif method == "cumulative":
+            cumulative = np.cumsum(self.transitions, axis=1)
+            columns = [np.ascontiguousarray(cumulative[:, k])
+                       for k in range(size - 1)]
+            flat = (cumulative + np.arange(size)[:, np.newaxis]).ravel()
+        else:
+            raise ValueError(f"unknown sampling method {method}")
+
+        state = np.searchsorted(np.cumsum(self.starts), rng.random(chains),
+                                side="right")
+        state = np.minimum(state, size - 1)
+        paths[0] = state
+        for t in range(1, steps):
+            u = rng.random(chains)
+            if method == "alias":
+                cell = state * size + rng.integers(0, size, chains)
+                state = np.where(u < probabilities[cell], cell % size,
+                                 aliases[cell])
+            elif size <= SMALL:
+                following = np.zeros(chains, dtype=np.intp)
+                for column in columns:
+                    following += u >= column[state]
+                state = following
+            else:
+                # Row i occupies [i, i + 1] in flat, so u + i finds row i
+                state = np.minimum(
+                    np.searchsorted(flat, u + state, side="right")
+                    - state * size, size - 1
+                )
+            paths[t] = state
+        return paths.T
+
+    def stationary(self):
+        """Returns the stationary distribution, solving pi P = pi."""
+        size = len(self.states)
+        system = np.vstack([self.transitions.T - np.eye(size),
+                            np.ones(size)])
+        target = np.zeros(size + 1)
+        target[-1] = 1
+        distribution = np.linalg.lstsq(system, target, rcond=None)[0]
+        return np.maximum(distribution, 0) / np.maximum(distribution, 0).sum()
+
+    def distribution(self, n, start=None):
+        """Returns the distribution after n steps, squaring P repeatedly.
+
+        Starts from start, or the chain's starting probabilities; n steps
+        cost O(S^3 log n).
+        """
+        result = np.asarray(self.starts if start is None else start,
+                            dtype=float)
+        power = self.transitions
+        while n:
+            if n & 1:
+                result = result @ power
+            n >>= 1
+            if n:
+                power = power @ power
+        return result
+
+    def hitting_times(self, targets):
+        """Returns the expected steps from each state to reach targets.
+
+        Solves (I - Q) h = 1 over the other states, where Q is the
+        transition matrix among them. States that cannot reach targets get
+        infinity.
+        """
+        size = len(self.states)
+        hit = np.zeros(size, dtype=bool)
+        hit[[self.index[target] for target in targets]] = True
+
+        # States that can reach a target, by walking transitions backwards
+        reach = hit.copy()
+        while True:
+            grown = reach | (self.transitions[:, reach] > 0).any(axis=1)
+            if (grown == reach).all():
+                break
+            reach = grown
+
+        times = np.full(size, np.inf)
+        times[hit] = 0
+        solve = reach & ~hit
+        q = self.transitions[np.ix_(solve, solve)]
+        times[solve] = np.linalg.solve(np.eye(solve.sum()) - q,
+                                       np.ones(solve.sum()))
+        return times
+
+    def save(self, filename):
+        """Writes the chain to a .npz file that load reads back."""
+        np.savez(
+            filename, kind=np.array("chain"), states=np.array(self.states),
+            starts=self.starts, transitions=self.transitions
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Reads a chain written by save."""
+        with np.load(filename, mmap_mode="r") as f:
+            if f["kind"] != "chain":
+                raise ValueError(f"{filename} does not hold a Markov chain")
+            return cls(f["states"].tolist(), f["starts"], f["transitions"])
+
+
+def alias_tables(transitions):
+    """Builds Walker alias tables for each row of a transition matrix.
+
+    Column k of row i is kept with probability probabilities[i, k] and
+    otherwise replaced by aliases[i, k], so sampling a row takes one
+    uniform column and one coin flip.
+    """
+    size = transitions.shape[1]
+    probabilities = np.ones(transitions.shape)
+    aliases = np.tile(np.arange(size), (transitions.shape[0], 1))
+    for i, row in enumerate(transitions):
+        scaled = list(row * size)
+        small = [k for k in range(size) if scaled[k] < 1]
+        large = [k for k in range(size) if scaled[k] >= 1]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            probabilities[i, less] = scaled[less]
+            aliases[i, less] = more
+            scaled[more] -= 1 - scaled[less]
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+    return probabilities, aliases
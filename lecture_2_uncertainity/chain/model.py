@@ -1,19 +1,13 @@
 from pomegranate import *
 
+from parameters import parameters
+
 # Define starting probabilities
-start = DiscreteDistribution({
-    "sun": 0.5,
-    "rain": 0.5
-})
+start = DiscreteDistribution(parameters["starts"])
 
 # Define transition model 
 # define transition probabilities
-transitions = ConditionalProbabilityTable([
-    ["sun", "sun", 0.8],
-    ["sun", "rain", 0.2],
-    ["rain", "sun", 0.3],
-    ["rain", "rain", 0.7]
-], [start])
+transitions = ConditionalProbabilityTable(parameters["transitions"], [start])
 
 # Create Markov chain
 model = MarkovChain([start, transitions])
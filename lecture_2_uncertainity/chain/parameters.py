@@ -0,0 +1,20 @@
+# Plain description of the weather chain, shared by model.py and the numpy code
+
+parameters = {
+    "states": ["sun", "rain"],
+
+    # Define starting probabilities
+    "starts": {
+        "sun": 0.5,
+        "rain": 0.5
+    },
+
+    # Define transition model 
+    # define transition probabilities
+    "transitions": [
+        ["sun", "sun", 0.8],
+        ["sun", "rain", 0.2],
+        ["rain", "sun", 0.3],
+        ["rain", "rain", 0.7]
+    ]
+}
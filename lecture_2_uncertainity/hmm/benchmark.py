@@ -0,0 +1,122 @@
+import time
+
+import numpy as np
+
+from hmm import HMM
+
+
+def sample_sequences(hmm, count, low, high, seed=0):
+    """Samples count observation sequences with lengths in [low, high]."""
+    rng = np.random.default_rng(seed)
+    sequences = []
+    for length in rng.integers(low, high + 1, size=count):
+        state = rng.choice(len(hmm.states), p=hmm.starts)
+        sequence = []
+        for _ in range(length):
+            symbol = rng.choice(len(hmm.symbols), p=hmm.emissions[state])
+            sequence.append(hmm.symbols[symbol])
+            state = rng.choice(len(hmm.states), p=hmm.transitions[state])
+        sequences.append(sequence)
+    return sequences
+
+
+def benchmark_decoding():
+    """Reports sequences per second for batched and one-at-a-time decoding."""
+    from decoding import stream_posterior, stream_viterbi
+
+    print("decoding sequences of 1 to 50 observations: sequences per second")
+    hmm = HMM.from_parameters()
+    sequences = sample_sequences(hmm, 100000, 1, 50)
+    for label, decode in [("viterbi", stream_viterbi),
+                          ("posterior", stream_posterior)]:
+        start = time.perf_counter()
+        for _ in decode(hmm, sequences):
+            pass
+        batched = len(sequences) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in decode(hmm, sequences[:2000], batch_size=1):
+            pass
+        single = 2000 / (time.perf_counter() - start)
+        print(f"  {label:<9} batched {batched:>9,.0f}/s,",
+              f"one at a time {single:>7,.0f}/s")
+
+    # pomegranate needs a heavy build, see requirements.txt
+    try:
+        from model import model
+    except ImportError:
+        print("  pomegranate not installed, skipping its predict")
+        return
+    start = time.perf_counter()
+    for sequence in sequences[:2000]:
+        model.predict(sequence)
+    rate = 2000 / (time.perf_counter() - start)
+    print(f"  pomegranate predict {rate:,.0f}/s")
+
+
+def benchmark_filtering():
+    """Reports observations per second through the online filter."""
+    from filtering import Filter
+
+    print("online filtering: observations per second")
+    hmm = HMM.from_parameters()
+    stream = sample_sequences(hmm, 1, 100000, 100000)[0]
+    for lag in [0, 5, 20]:
+        online = Filter(hmm, lag)
+        start = time.perf_counter()
+        for observation in stream:
+            online.update(observation)
+            online.smooth()
+        rate = len(stream) / (time.perf_counter() - start)
+        print(f"  lag {lag:<3} {rate:>9,.0f}/s,",
+              f"{len(online.history)} beliefs kept")
+
+
+def random_hmm(states, degree, symbols=8, seed=0):
+    """Builds an HMM whose states each have degree outgoing transitions."""
+    from sparse import CSR
+
+    rng = np.random.default_rng(seed)
+    targets = np.array([rng.choice(states, degree, replace=False)
+                        for _ in range(states)])
+    weights = rng.random((states, degree)) + 0.1
+    weights /= weights.sum(axis=1, keepdims=True)
+    order = np.argsort(targets, axis=1)
+    transitions = CSR(np.take_along_axis(weights, order, axis=1).ravel(),
+                      np.take_along_axis(targets, order, axis=1).ravel(),
+                      np.arange(states + 1) * degree, (states, states))
+    emissions = rng.random((states, symbols)) + 0.1
+    emissions /= emissions.sum(axis=1, keepdims=True)
+    return HMM(range(states), range(symbols), np.full(states, 1 / states),
+               transitions, emissions)
+
+
+def benchmark_sparse():
+    """Sweeps state count and out-degree for sparse and dense decoding."""
+    from decoding import forward, viterbi
+
+    print("sparse transitions: seconds for 16 sequences of 50 steps")
+    rng = np.random.default_rng(0)
+    for states in [100, 1000, 10000]:
+        for degree in [4, 32]:
+            sparse = random_hmm(states, degree)
+            batch = rng.integers(0, len(sparse.symbols), size=(16, 50))
+            lengths = np.full(16, 50)
+            timings = []
+            models = [("sparse", sparse)]
+            if states <= 1000:
+                dense = HMM(sparse.states, sparse.symbols, sparse.starts,
+                            sparse.transitions.toarray(), sparse.emissions)
+                models.append(("dense", dense))
+            for label, hmm in models:
+                for decode in [viterbi, forward]:
+                    start = time.perf_counter()
+                    decode(hmm, batch, lengths)
+                    timings.append(f"{label} {decode.__name__}"
+                                   f" {time.perf_counter() - start:.4f}s")
+            print(f"  S={states:<6} degree {degree:<3}", ", ".join(timings))
+
+
+if __name__ == "__main__":
+    benchmark_decoding()
+    benchmark_filtering()
+    benchmark_sparse()
@@ -0,0 +1,174 @@
+import itertools
+
+import numpy as np
+
+# Sequences decoded together by the streaming functions
+BATCH_SIZE = 1024
+
+
+def log(array):
+    with np.errstate(divide="ignore"):
+        return np.log(array)
+
+
+def logsumexp(array, axis):
+    """Returns log(sum(exp(array))) along axis without overflow."""
+    peak = np.max(array, axis=axis, keepdims=True)
+    peak = np.where(np.isfinite(peak), peak, 0)
+    with np.errstate(divide="ignore"):
+        total = np.log(np.sum(np.exp(array - peak), axis=axis, keepdims=True))
+    return np.squeeze(total + peak, axis=axis)
+
+
+def issparse(matrix):
+    """Checks for a CSR matrix, from sparse.py or scipy."""
+    return hasattr(matrix, "indptr")
+
+
+def pad(hmm, sequences):
+    """Encodes sequences of observations into a padded (B, T) batch.
+
+    Returns the batch and the length of each sequence. Padding is code 0
+    and every function here ignores it.
+    """
+    codes = [hmm.encode(sequence) for sequence in sequences]
+    if any(len(c) == 0 for c in codes):
+        raise ValueError("cannot decode an empty sequence")
+    lengths = np.array([len(c) for c in codes], dtype=np.intp)
+    batch = np.zeros((len(codes), max(lengths, default=0)), dtype=np.intp)
+    for i, c in enumerate(codes):
+        batch[i, :len(c)] = c
+    return batch, lengths
+
+
+def viterbi(hmm, batch, lengths):
+    """Returns the most likely state paths and their log-probabilities.
+
+    Paths are a (B, T) array of state codes with -1 past each length.
+    """
+    if issparse(hmm.transitions):
+        import sparse
+        return sparse.viterbi(hmm, batch, lengths)
+
+    size, steps = batch.shape
+    log_transitions = log(hmm.transitions)
+    log_emissions = log(hmm.emissions).T
+    delta = log(hmm.starts) + log_emissions[batch[:, 0]]
+    back = np.zeros((size, steps, len(hmm.states)), dtype=np.intp)
+    for t in range(1, steps):
+        scores = delta[:, :, np.newaxis] + log_transitions
+        back[:, t] = np.argmax(scores, axis=1)
+        best = np.max(scores, axis=1) + log_emissions[batch[:, t]]
+        delta = np.where((t < lengths)[:, np.newaxis], best, delta)
+
+    # Follow back pointers from each sequence's last step
+    paths = np.full((size, steps), -1, dtype=np.intp)
+    rows = np.arange(size)
+    state = np.argmax(delta, axis=1)
+    for t in range(steps - 1, -1, -1):
+        active = t < lengths
+        paths[active, t] = state[active]
+        state = np.where(active & (t > 0), back[rows, t, state], state)
+    return paths, np.max(delta, axis=1)
+
+
+def forward(hmm, batch, lengths):
+    """Returns log forward messages (B, T, S) and each log-likelihood.
+
+    Entry [b, t, i] is log P(observations up to t, state i at t).
+    """
+    if issparse(hmm.transitions):
+        import sparse
+        return sparse.forward(hmm, batch, lengths)
+
+    size, steps = batch.shape
+    log_transitions = log(hmm.transitions)
+    log_emissions = log(hmm.emissions).T
+    alpha = np.empty((size, steps, len(hmm.states)))
+    alpha[:, 0] = log(hmm.starts) + log_emissions[batch[:, 0]]
+    for t in range(1, steps):
+        step = logsumexp(alpha[:, t - 1, :, np.newaxis] + log_transitions,
+                         axis=1) + log_emissions[batch[:, t]]
+        alpha[:, t] = np.where((t < lengths)[:, np.newaxis], step,
+                               alpha[:, t - 1])
+    return alpha, logsumexp(alpha[:, -1], axis=1)
+
+
+def backward(hmm, batch, lengths):
+    """Returns log backward messages (B, T, S).
+
+    Entry [b, t, i] is log P(observations after t | state i at t).
+    """
+    if issparse(hmm.transitions):
+        import sparse
+        return sparse.backward(hmm, batch, lengths)
+
+    size, steps = batch.shape
+    log_transitions = log(hmm.transitions)
+    log_emissions = log(hmm.emissions).T
+    beta = np.zeros((size, steps, len(hmm.states)))
+    for t in range(steps - 2, -1, -1):
+        step = logsumexp(
+            log_transitions
+            + (log_emissions[batch[:, t + 1]] + beta[:, t + 1])[:, np.newaxis],
+            axis=2
+        )
+        beta[:, t] = np.where((t + 1 < lengths)[:, np.newaxis], step, 0)
+    return beta
+
+
+def posterior(hmm, batch, lengths):
+    """Returns P(state at t | all observations) as a (B, T, S) array."""
+    alpha, likelihood = forward(hmm, batch, lengths)
+    beta = backward(hmm, batch, lengths)
+    return np.exp(alpha + beta - likelihood[:, np.newaxis, np.newaxis])
+
+
+def stream(hmm, sequences, decode, batch_size):
+    """Yields decode's result for each sequence, in input order.
+
+    Reads batch_size * 16 sequences at a time and sorts them by length
+    into batches, so little work is spent on padding while memory stays
+    bounded.
+    """
+    sequences = iter(sequences)
+    while True:
+        block = list(itertools.islice(sequences, batch_size * 16))
+        if not block:
+            return
+        order = sorted(range(len(block)), key=lambda i: len(block[i]))
+        results = [None] * len(block)
+        for start in range(0, len(block), batch_size):
+            positions = order[start:start + batch_size]
+            batch, lengths = pad(hmm, [block[i] for i in positions])
+            for i, result in zip(positions, decode(hmm, batch, lengths)):
+                results[i] = result
+        yield from results
+
+
+def decode_viterbi(hmm, batch, lengths):
+    paths, scores = viterbi(hmm, batch, lengths)
+    return [(paths[i, :n], scores[i]) for i, n in enumerate(lengths)]
+
+
+def decode_posterior(hmm, batch, lengths):
+    alpha, likelihood = forward(hmm, batch, lengths)
+    states = np.argmax(alpha + backward(hmm, batch, lengths), axis=2)
+    return [(states[i, :n], likelihood[i]) for i, n in enumerate(lengths)]
+
+
+def stream_viterbi(hmm, sequences, batch_size=BATCH_SIZE):
+    """Yields the most likely path and its log-probability per sequence.
+
+    Sequences may be any iterable, such as a generator reading a file.
+    """
+    return stream(hmm, sequences, decode_viterbi, batch_size)
+
+
+def stream_posterior(hmm, sequences, batch_size=BATCH_SIZE):
+    """Yields the most probable state at each step and the log-likelihood.
+
+    Like stream_viterbi but decodes each step by its posterior marginal,
+    as pomegranate's predict does.
+    """
+    return stream(hmm, sequences, decode_posterior, batch_size)
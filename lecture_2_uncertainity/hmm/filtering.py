@@ -0,0 +1,67 @@
+import collections
+
+import numpy as np
+
+from hmm import HMM
+
+
+class Filter():
+    """Tracks the belief over states of an HMM as observations arrive.
+
+    Each update costs O(S^2), or O(nnz) with sparse transitions, and keeps
+    no history, so streams of any length run in constant memory. With a
+    lag, the last lag + 1 filtered beliefs and observations are kept in a
+    ring buffer, and smooth returns the belief for lag steps ago given
+    every observation since, at O(lag S^2) per update.
+    """
+
+    def __init__(self, hmm=None, lag=0):
+        self.hmm = hmm or HMM.from_parameters()
+        self.lag = lag
+        self.belief = None
+        self.steps = 0
+        self.log_likelihood = 0.0
+        self.history = collections.deque(maxlen=lag + 1)
+
+    def update(self, observation):
+        """Folds in one observation, returning the filtered belief."""
+        code = self.hmm.index[observation]
+        if self.belief is None:
+            belief = self.hmm.starts * self.hmm.emissions[:, code]
+        else:
+            belief = (self.belief @ self.hmm.transitions
+                      * self.hmm.emissions[:, code])
+        total = belief.sum()
+        if total == 0:
+            raise ValueError(f"observation {observation!r} is impossible")
+        self.belief = belief / total
+        self.log_likelihood += np.log(total)
+        self.steps += 1
+        if self.lag:
+            self.history.append((self.belief, code))
+        return self.belief
+
+    def update_many(self, observations):
+        """Folds in a micro-batch, returning each filtered belief."""
+        return np.array([self.update(o) for o in observations])
+
+    def smooth(self):
+        """Returns the step lag steps ago and its smoothed belief.
+
+        None until lag + 1 observations have arrived.
+        """
+        if self.steps <= self.lag:
+            return None
+        if not self.lag:
+            return self.steps - 1, self.belief
+        backward = np.ones(len(self.hmm.states))
+        for _, code in reversed(list(self.history)[1:]):
+            backward = self.hmm.transitions @ (self.hmm.emissions[:, code]
+                                               * backward)
+            backward /= backward.sum()
+        belief = self.history[0][0] * backward
+        return self.steps - 1 - self.lag, belief / belief.sum()
+
+    def state(self):
+        """Returns the name of the most likely current state."""
+        return self.hmm.states[int(np.argmax(self.belief))]
@@ -0,0 +1,82 @@
+import numpy as np
+
+from parameters import parameters
+
+
+class HMM():
+    """Hidden Markov model with integer-coded states and observations.
+
+    `starts` holds P(first state), `transitions[i, j]` P(next state j |
+    state i) and `emissions[i, k]` P(observation k | state i). Transitions
+    may also be a CSR matrix, see sparse.py.
+    """
+
+    def __init__(self, states, symbols, starts, transitions, emissions):
+        self.states = list(states)
+        self.symbols = list(symbols)
+        self.starts = np.asarray(starts, dtype=float)
+        if hasattr(transitions, "indptr"):
+            self.transitions = transitions
+        else:
+            self.transitions = np.asarray(transitions, dtype=float)
+        self.emissions = np.asarray(emissions, dtype=float)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_parameters(cls, spec=parameters):
+        """Builds the model from a spec in the format of parameters.py."""
+        states = spec["states"]
+        symbols = []
+        for state in states:
+            for symbol in spec["emissions"][state]:
+                if symbol not in symbols:
+                    symbols.append(symbol)
+        emissions = [
+            [spec["emissions"][state].get(symbol, 0) for symbol in symbols]
+            for state in states
+        ]
+        return cls(states, symbols, spec["starts"], spec["transitions"],
+                   emissions)
+
+    def encode(self, observations):
+        """Maps a sequence of observations to their integer codes."""
+        try:
+            return np.array([self.index[o] for o in observations],
+                            dtype=np.intp)
+        except KeyError as error:
+            raise ValueError(f"unknown observation {error}") from None
+
+    def save(self, filename):
+        """Writes the model to a .npz file that load reads back.
+
+        Sparse transitions are written as their CSR arrays.
+        """
+        if hasattr(self.transitions, "indptr"):
+            transitions = {
+                "data": self.transitions.data,
+                "indices": self.transitions.indices,
+                "indptr": self.transitions.indptr,
+                "shape": np.array(self.transitions.shape)
+            }
+        else:
+            transitions = {"transitions": self.transitions}
+        np.savez(
+            filename, kind=np.array("hmm"), states=np.array(self.states),
+            symbols=np.array(self.symbols), starts=self.starts,
+            emissions=self.emissions, **transitions
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """Reads a model written by save."""
+        with np.load(filename, mmap_mode="r") as f:
+            if f["kind"] != "hmm":
+                raise ValueError(f"{filename} does not hold an HMM")
+            if "transitions" in f.files:
+                transitions = f["transitions"]
+            else:
+                from sparse import CSR
+                transitions = CSR(f["data"], f["indices"], f["indptr"],
+                                  f["shape"])
+            return cls(f["states"].tolist(), f["symbols"].tolist(),
+                       f["starts"], transitions, f["emissions"])
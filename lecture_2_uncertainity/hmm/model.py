@@ -1,31 +1,24 @@
 from pomegranate import *
 
+from parameters import parameters
+
 # Observation model for each state 
 # probability of each state according to observed data
-sun = DiscreteDistribution({
-    "umbrella": 0.2,
-    "no umbrella": 0.8
-})
-
-rain = DiscreteDistribution({
-    "umbrella": 0.9,
-    "no umbrella": 0.1
-})
-
-states = [sun, rain]
+states = [
+    DiscreteDistribution(parameters["emissions"][name])
+    for name in parameters["states"]
+]
+sun, rain = states
 
 # Transition model , transistion probabilities
-transitions = numpy.array(
-    [[0.8, 0.2], # Tomorrow's predictions if today = sun
-     [0.3, 0.7]] # Tomorrow's predictions if today = rain
-)
+transitions = numpy.array(parameters["transitions"])
 
 # Starting probabilities
-starts = numpy.array([0.5, 0.5])
+starts = numpy.array(parameters["starts"])
 
 # Create the model
 model = HiddenMarkovModel.from_matrix(
     transitions, states, starts,
-    state_names=["sun", "rain"]
+    state_names=parameters["states"]
 )
 model.bake()
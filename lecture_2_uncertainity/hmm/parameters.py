@@ -0,0 +1,27 @@
+# Plain description of the umbrella model, shared by model.py and the numpy code
+
+parameters = {
+    "states": ["sun", "rain"],
+
+    # Observation model for each state 
+    # probability of each state according to observed data
+    "emissions": {
+        "sun": {
+            "umbrella": 0.2,
+            "no umbrella": 0.8
+        },
+        "rain": {
+            "umbrella": 0.9,
+            "no umbrella": 0.1
+        }
+    },
+
+    # Transition model , transistion probabilities
+    "transitions": [
+        [0.8, 0.2], # Tomorrow's predictions if today = sun
+        [0.3, 0.7]  # Tomorrow's predictions if today = rain
+    ],
+
+    # Starting probabilities
+    "starts": [0.5, 0.5]
+}
@@ -1,4 +1,9 @@
-from model import model
+from decoding import stream_posterior
+from hmm import HMM
+
+# Decode with numpy in log space, see decoding.py;
+# model.predict from model.py gives the same states
+model = HMM.from_parameters()
 
 # hmm means hidden Markov model
 # Observed data
@@ -16,6 +21,6 @@ observations = [
 
 # Predict underlying states 
 # prdict the corresponding states for observed data
-predictions = model.predict(observations)
+predictions, likelihood = next(stream_posterior(model, [observations]))
 for prediction in predictions:
-    print(model.states[prediction].name)
+    print(model.states[prediction])
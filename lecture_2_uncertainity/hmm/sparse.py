@@ -0,0 +1,169 @@
+import numpy as np
+
+from decoding import log, logsumexp
+
+
+class CSR():
+    """Compressed sparse row matrix with the layout of scipy's csr_matrix.
+
+    Row i holds values data[indptr[i]:indptr[i + 1]] in the columns
+    indices[indptr[i]:indptr[i + 1]]. A scipy csr_matrix works anywhere
+    this class does. Products with a vector, matrix @ x and x @ matrix,
+    cost O(nnz) and return dense arrays, as scipy's do.
+    """
+
+    # Makes numpy defer x @ matrix to __rmatmul__
+    __array_ufunc__ = None
+
+    def __init__(self, data, indices, indptr, shape):
+        self.data = np.asarray(data, dtype=float)
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.indptr = np.asarray(indptr, dtype=np.intp)
+        self.shape = tuple(shape)
+        self.rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    @classmethod
+    def from_dense(cls, matrix):
+        matrix = np.asarray(matrix, dtype=float)
+        rows, columns = np.nonzero(matrix)
+        indptr = np.zeros(matrix.shape[0] + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows, minlength=matrix.shape[0]),
+                  out=indptr[1:])
+        return cls(matrix[rows, columns], columns, indptr, matrix.shape)
+
+    def toarray(self):
+        matrix = np.zeros(self.shape)
+        matrix[self.rows, self.indices] = self.data
+        return matrix
+
+    def __matmul__(self, vector):
+        return np.bincount(self.rows, weights=self.data * vector[self.indices],
+                           minlength=self.shape[0])
+
+    def __rmatmul__(self, vector):
+        return np.bincount(self.indices, weights=vector[self.rows] * self.data,
+                           minlength=self.shape[1])
+
+
+class Edges():
+    """Transitions of a sparse matrix as edge lists grouped two ways.
+
+    Edges are kept in row order, grouped by source state, and in column
+    order, grouped by target state, with the start of each nonempty group
+    for numpy's reduceat.
+    """
+
+    def __init__(self, matrix):
+        size = matrix.shape[0]
+        counts = np.diff(matrix.indptr)
+        self.size = size
+        self.sources = np.repeat(np.arange(size), counts)
+        self.targets = np.asarray(matrix.indices, dtype=np.intp)
+        self.weights = log(np.asarray(matrix.data, dtype=float))
+        self.by_source = Groups(self.sources, size)
+
+        # Stable sort keeps sources ascending within each target
+        self.order = np.argsort(self.targets, kind="stable")
+        self.by_target = Groups(self.targets[self.order], size)
+
+
+class Groups():
+    """Runs of equal keys in a sorted key array, for reduceat."""
+
+    def __init__(self, keys, size):
+        counts = np.bincount(keys, minlength=size)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self.nonempty = counts > 0
+        self.starts = starts[self.nonempty]
+        self.keys = keys
+        self.size = size
+
+    def max(self, values):
+        """Returns the maximum of each group of columns, -inf if empty."""
+        result = np.full((len(values), self.size), -np.inf)
+        if len(self.starts):
+            result[:, self.nonempty] = np.maximum.reduceat(values, self.starts,
+                                                           axis=1)
+        return result
+
+    def logsumexp(self, values):
+        """Returns log(sum(exp(values))) of each group, -inf if empty."""
+        peak = self.max(values)
+        safe = np.where(np.isfinite(peak), peak, 0)
+        result = np.full((len(values), self.size), -np.inf)
+        if len(self.starts):
+            total = np.add.reduceat(np.exp(values - safe[:, self.keys]),
+                                    self.starts, axis=1)
+            with np.errstate(divide="ignore"):
+                result[:, self.nonempty] = (np.log(total)
+                                            + safe[:, self.nonempty])
+        return result
+
+
+def viterbi(hmm, batch, lengths):
+    """Sparse max-product version of decoding.viterbi.
+
+    Each step costs O(B * nnz) time and memory instead of O(B * S^2).
+    """
+    edges = Edges(hmm.transitions)
+    size, steps = batch.shape
+    log_emissions = log(hmm.emissions).T
+    delta = log(hmm.starts) + log_emissions[batch[:, 0]]
+    back = np.zeros((size, steps, edges.size), dtype=np.intp)
+    sources = edges.sources[edges.order]
+    weights = edges.weights[edges.order]
+    positions = np.arange(len(sources))
+    for t in range(1, steps):
+        scores = delta[:, sources] + weights
+        best = edges.by_target.max(scores)
+
+        # First edge into each target reaching its maximum
+        winners = np.where(scores == best[:, edges.by_target.keys],
+                           positions, len(positions))
+        first = np.zeros((size, edges.size), dtype=np.intp)
+        first[:, edges.by_target.nonempty] = np.minimum.reduceat(
+            winners, edges.by_target.starts, axis=1
+        )
+        back[:, t] = sources[first]
+        best = best + log_emissions[batch[:, t]]
+        delta = np.where((t < lengths)[:, np.newaxis], best, delta)
+
+    paths = np.full((size, steps), -1, dtype=np.intp)
+    rows = np.arange(size)
+    state = np.argmax(delta, axis=1)
+    for t in range(steps - 1, -1, -1):
+        active = t < lengths
+        paths[active, t] = state[active]
+        state = np.where(active & (t > 0), back[rows, t, state], state)
+    return paths, np.max(delta, axis=1)
+
+
+def forward(hmm, batch, lengths):
+    """Sparse sum-product version of decoding.forward."""
+    edges = Edges(hmm.transitions)
+    size, steps = batch.shape
+    log_emissions = log(hmm.emissions).T
+    sources = edges.sources[edges.order]
+    weights = edges.weights[edges.order]
+    alpha = np.empty((size, steps, edges.size))
+    alpha[:, 0] = log(hmm.starts) + log_emissions[batch[:, 0]]
+    for t in range(1, steps):
+        step = edges.by_target.logsumexp(alpha[:, t - 1, sources] + weights)
+        step += log_emissions[batch[:, t]]
+        alpha[:, t] = np.where((t < lengths)[:, np.newaxis], step,
+                               alpha[:, t - 1])
+    return alpha, logsumexp(alpha[:, -1], axis=1)
+
+
+def backward(hmm, batch, lengths):
+    """Sparse sum-product version of decoding.backward."""
+    edges = Edges(hmm.transitions)
+    size, steps = batch.shape
+    log_emissions = log(hmm.emissions).T
+    beta = np.zeros((size, steps, edges.size))
+    for t in range(steps - 2, -1, -1):
+        ahead = log_emissions[batch[:, t + 1]] + beta[:, t + 1]
+        step = edges.by_source.logsumexp(ahead[:, edges.targets]
+                                         + edges.weights)
+        beta[:, t] = np.where((t + 1 < lengths)[:, np.newaxis], step, 0)
+    return beta
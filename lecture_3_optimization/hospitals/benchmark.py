@@ -0,0 +1,135 @@
+import random
+import time
+
+from hospitals import Distances, Space, exponential_schedule
+
+
+def make_space(height, width, num_hospitals, num_houses, seed=0):
+    """Builds a space with houses at distinct random cells."""
+    rng = random.Random(seed)
+    space = Space(height, width, num_hospitals)
+    cells = rng.sample(range(height * width), num_houses)
+    for cell in cells:
+        space.add_house(*divmod(cell, width))
+    return space
+
+
+def full_iteration(space):
+    """Scores every neighbor by recomputing get_cost, as hill_climb did."""
+    for hospital in space.hospitals:
+        for replacement in space.get_neighbors(*hospital):
+            neighbor = space.hospitals.copy()
+            neighbor.remove(hospital)
+            neighbor.add(replacement)
+            space.get_cost(neighbor)
+
+
+def incremental_iteration(space, hospitals, distances):
+    """Scores every neighbor from nearest distances, as hill_climb does."""
+    for i, hospital in enumerate(hospitals):
+        for replacement in space.get_neighbors(*hospital):
+            distances.cost_after_move(i, replacement)
+
+
+def benchmark_hill_climb():
+    """Reports hill-climbing iterations per second on large grids."""
+    print("hill climbing: iterations per second")
+    for height, width, num_hospitals, num_houses in [
+        (50, 50, 5, 200),
+        (200, 200, 10, 1000),
+        (1000, 1000, 20, 10000)
+    ]:
+        space = make_space(height, width, num_hospitals, num_houses)
+        random.seed(0)
+        space.hill_climb(maximum=0)
+        start = time.perf_counter()
+        full_iteration(space)
+        full = 1 / (time.perf_counter() - start)
+
+        # hill_climb builds the distances once and updates them as it moves
+        hospitals = list(space.hospitals)
+        distances = Distances(space.house_array(), hospitals,
+                              space.height + space.width)
+        start = time.perf_counter()
+        for _ in range(10):
+            incremental_iteration(space, hospitals, distances)
+        incremental = 10 / (time.perf_counter() - start)
+        print(f"  {height}x{width}, {num_hospitals} hospitals,",
+              f"{num_houses} houses: get_cost {full:,.2f}/s,",
+              f"incremental {incremental:,.1f}/s")
+
+
+def benchmark_restarts():
+    """Reports parallel random restarts per second as workers grow."""
+    import os
+
+    print("parallel random restarts: 1000 restarts on a 40x40 grid")
+    space = make_space(40, 40, 5, 100)
+    processes = 1
+    while processes <= os.cpu_count():
+        start = time.perf_counter()
+        hospitals, cost, stats = space.parallel_restart(
+            1000, seed=0, processes=processes
+        )
+        elapsed = time.perf_counter() - start
+        print(f"  {processes:<3} workers {1000 / elapsed:,.1f} restarts/s,",
+              f"best cost {cost}")
+        processes *= 2
+
+
+def restart_until(space, budget, seed=0):
+    """Runs hill climbing from fresh random starts for budget CPU seconds.
+
+    Returns the best cost, the climbs made and the CPU seconds used, which
+    overrun budget by up to one climb.
+    """
+    start = time.process_time()
+    best_cost = None
+    i = 0
+    while time.process_time() - start < budget:
+        hospitals = space.hill_climb(rng=random.Random(f"{seed}:{i}"))
+        cost = space.get_cost(hospitals)
+        if best_cost is None or cost < best_cost:
+            best_cost = cost
+        i += 1
+    return best_cost, i, time.process_time() - start
+
+
+def benchmark_annealing():
+    """Compares solution quality per CPU-second with random restarts."""
+    print("single-move searches against random restarts: best cost")
+    for height, width, num_hospitals, num_houses, budget in [
+        (100, 100, 5, 100, 5),
+        (1000, 1000, 20, 10000, 20)
+    ]:
+        space = make_space(height, width, num_hospitals, num_houses)
+        print(f"  {height}x{width}, {num_hospitals} hospitals,",
+              f"{num_houses} houses")
+        cost, climbs, budget = restart_until(space, budget)
+        print(f"    random restart      {cost:>9,} in {budget:.1f}s",
+              f"({climbs} climbs)")
+
+        # Start near the cost of moving one hospital a cell; the budget,
+        # the same CPU time the restarts took, ends the search
+        schedule = exponential_schedule(num_houses / num_hospitals, 0.99995)
+        searches = [
+            ("simulated annealing", lambda callback: space.simulated_annealing(
+                schedule, budget=budget, callback=callback,
+                interval=10 ** 9, rng=random.Random(0))),
+            ("tabu search", lambda callback: space.tabu_search(
+                10, budget=budget, callback=callback,
+                interval=10 ** 9, rng=random.Random(0)))
+        ]
+        for label, search in searches:
+            steps = []
+            start = time.process_time()
+            hospitals = search(lambda step, cost, best: steps.append(step))
+            elapsed = time.process_time() - start
+            print(f"    {label:<19} {space.get_cost(hospitals):>9,}",
+                  f"in {elapsed:.1f}s ({steps[-1] / elapsed:,.0f} steps/s)")
+
+
+if __name__ == "__main__":
+    benchmark_hill_climb()
+    benchmark_restarts()
+    benchmark_annealing()
@@ -1,4 +1,10 @@
+import concurrent.futures
+import math
+import os
 import random
+import time
+
+import numpy as np
 
 
 class Space():
@@ -32,19 +38,31 @@ class Space():
             candidates.remove(hospital)
         return candidates
 
-    def hill_climb(self, maximum=None, image_prefix=None, log=False):
-        """Performs hill-climbing to find a solution."""
+    def hill_climb(self, maximum=None, image_prefix=None, log=False,
+                   rng=random):
+        """Performs hill-climbing to find a solution.
+
+        Random choices come from rng, the random module unless given a
+        random.Random of its own.
+        """
         count = 0
 
         # Start by initializing hospitals randomly
         self.hospitals = set()
         for i in range(self.num_hospitals):
-            self.hospitals.add(random.choice(list(self.available_spaces())))
+            self.hospitals.add(rng.choice(list(self.available_spaces())))
         if log:
             print("Initial state: cost", self.get_cost(self.hospitals))
         if image_prefix:
             self.output_image(f"{image_prefix}{str(count).zfill(3)}.png")
 
+        # Nearest distances are kept up to date as hospitals move, with
+        # each hospital's position in them looked up by its cell
+        hospitals = list(self.hospitals)
+        distances = Distances(self.house_array(), hospitals,
+                              self.height + self.width)
+        positions = {hospital: i for i, hospital in enumerate(hospitals)}
+
         # Continue until we reach maximum number of iterations
         while maximum is None or count < maximum:
             count += 1
@@ -57,28 +75,31 @@ class Space():
                 # Consider all neighbors for that hospital
                 for replacement in self.get_neighbors(*hospital):
 
-                    # Generate a neighboring set of hospitals
-                    neighbor = self.hospitals.copy()
-                    neighbor.remove(hospital)
-                    neighbor.add(replacement)
-
                     # Check if neighbor is best so far
-                    cost = self.get_cost(neighbor)
+                    cost = distances.cost_after_move(positions[hospital],
+                                                     replacement)
                     if best_neighbor_cost is None or cost < best_neighbor_cost:
                         best_neighbor_cost = cost
-                        best_neighbors = [neighbor]
+                        best_neighbors = [(hospital, replacement)]
                     elif best_neighbor_cost == cost:
-                        best_neighbors.append(neighbor)
+                        best_neighbors.append((hospital, replacement))
 
             # None of the neighbors are better than the current state
-            if best_neighbor_cost >= self.get_cost(self.hospitals):
+            if best_neighbor_cost >= distances.cost:
                 return self.hospitals
 
             # Move to a highest-valued neighbor
             else:
                 if log:
                     print(f"Found better neighbor: cost {best_neighbor_cost}")
-                self.hospitals = random.choice(best_neighbors)
+                hospital, replacement = rng.choice(best_neighbors)
+                i = positions.pop(hospital)
+                positions[replacement] = i
+                distances.move(i, replacement)
+                neighbor = self.hospitals.copy()
+                neighbor.remove(hospital)
+                neighbor.add(replacement)
+                self.hospitals = neighbor
 
             # Generate image
             if image_prefix:
@@ -107,6 +128,144 @@ class Space():
 
         return best_hospitals
 
+    def parallel_restart(self, maximum, seed=0, processes=None, log=False):
+        """Repeats hill-climbing across worker processes.
+
+        Restart i draws from its own random.Random seeded by seed and i,
+        and ties go to the earliest restart, so the result depends only on
+        seed, never on the number of processes. Returns the best hospitals,
+        their cost and a (cost, seconds) pair per restart.
+        """
+        tasks = [(seed, i) for i in range(maximum)]
+        processes = processes or os.cpu_count()
+        if processes == 1:
+            start_worker(self)
+            results = [run_restart(task) for task in tasks]
+        else:
+            chunksize = max(1, maximum // (processes * 4))
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes, initializer=start_worker,
+                initargs=(self,)
+            ) as executor:
+                results = list(executor.map(run_restart, tasks,
+                                            chunksize=chunksize))
+
+        best_hospitals = None
+        best_cost = None
+        for i, (hospitals, cost, seconds) in enumerate(results):
+            if best_cost is None or cost < best_cost:
+                best_cost = cost
+                best_hospitals = hospitals
+                if log:
+                    print(f"{i}: Found new best state: cost {cost}")
+        stats = [(cost, seconds) for hospitals, cost, seconds in results]
+        return best_hospitals, best_cost, stats
+
+    def simulated_annealing(self, schedule, steps=None, budget=None,
+                            callback=None, interval=1000, rng=random):
+        """Performs simulated annealing, trying one random move per step.
+
+        schedule maps the step number to a temperature, and a move raising
+        the cost by d is made with probability exp(-d / temperature). Stops
+        once the temperature reaches 0, after steps steps or after budget
+        seconds; one of the last two is needed, as a schedule may never
+        reach 0. callback(step, cost, best_cost) is called every interval
+        steps and at the end. Returns the best hospitals found.
+        """
+        if steps is None and budget is None:
+            raise ValueError("simulated annealing needs steps or a budget")
+        search = Search(self, rng)
+        start = time.perf_counter()
+        step = 0
+        while steps is None or step < steps:
+            temperature = schedule(step)
+            if temperature <= 0:
+                break
+            if budget is not None and time.perf_counter() - start >= budget:
+                break
+            step += 1
+
+            # Score one random move and decide whether to make it
+            index, replacement = search.random_move()
+            if replacement is not None:
+                increase = (search.distances.cost_after_move(index, replacement)
+                            - search.distances.cost)
+                if increase <= 0 or (
+                    rng.random() < math.exp(-increase / temperature)
+                ):
+                    search.move(index, replacement)
+            if callback and step % interval == 0:
+                callback(step, search.distances.cost, search.best_cost)
+
+        if callback:
+            callback(step, search.distances.cost, search.best_cost)
+        self.hospitals = set(search.best)
+        return self.hospitals
+
+    def tabu_search(self, tenure, sample=None, steps=None, budget=None,
+                    callback=None, interval=1000, rng=random):
+        """Performs tabu search, trying one random move per step.
+
+        Every sample steps, by default four per hospital or about one
+        neighborhood, the best move tried is made even if it raises the
+        cost. A cell a hospital leaves is tabu for the next tenure moves,
+        unless moving there beats the best cost found. Stops after steps
+        steps or budget seconds, one of which is needed. callback is as for
+        simulated_annealing. Returns the best hospitals found.
+        """
+        if steps is None and budget is None:
+            raise ValueError("tabu search needs steps or a budget")
+        sample = sample or 4 * self.num_hospitals
+        search = Search(self, rng)
+        tabu = {}
+        moves = 0
+        candidate = None
+        start = time.perf_counter()
+        step = 0
+        while steps is None or step < steps:
+            if budget is not None and time.perf_counter() - start >= budget:
+                break
+            step += 1
+
+            # Keep the best allowed move tried in this round
+            index, replacement = search.random_move()
+            if replacement is not None:
+                cost = search.distances.cost_after_move(index, replacement)
+                allowed = tabu.get(replacement, 0) <= moves
+                if (allowed or cost < search.best_cost) and (
+                    candidate is None or cost < candidate[0]
+                ):
+                    candidate = (cost, index, replacement)
+
+            # End of the round: make the move, tabooing the cell it leaves
+            if step % sample == 0 and candidate is not None:
+                cost, index, replacement = candidate
+                candidate = None
+                moves += 1
+                tabu[search.hospitals[index]] = moves + tenure
+                search.move(index, replacement)
+                if len(tabu) > 2 * tenure:
+                    tabu = {cell: until for cell, until in tabu.items()
+                            if until > moves}
+            if callback and step % interval == 0:
+                callback(step, search.distances.cost, search.best_cost)
+
+        if callback:
+            callback(step, search.distances.cost, search.best_cost)
+        self.hospitals = set(search.best)
+        return self.hospitals
+
+    def random_hospitals(self, rng=random):
+        """Returns num_hospitals distinct random cells free of houses."""
+        if self.height * self.width - len(self.houses) < self.num_hospitals:
+            raise ValueError("not enough free cells for the hospitals")
+        hospitals = []
+        while len(hospitals) < self.num_hospitals:
+            cell = (rng.randrange(self.height), rng.randrange(self.width))
+            if cell not in self.houses and cell not in hospitals:
+                hospitals.append(cell)
+        return hospitals
+
     def get_cost(self, hospitals):
         """Calculates sum of distances from houses to nearest hospital."""
         cost = 0
@@ -117,6 +276,10 @@ class Space():
             )
         return cost
 
+    def house_array(self):
+        """Returns the houses as an (n, 2) array of rows and columns."""
+        return np.array(list(self.houses), dtype=np.int64).reshape(-1, 2)
+
     def get_neighbors(self, row, col):
         """Returns neighbors not already containing a house or hospital."""
         candidates = [
@@ -190,11 +353,168 @@ class Space():
         img.save(filename)
 
 
-# Create a new space and add houses randomly
-s = Space(height=10, width=20, num_hospitals=3)
-for i in range(15):
-    s.add_house(random.randrange(s.height), random.randrange(s.width))
+class Search():
+    """State of a search moving one hospital at a time from random cells.
+
+    Keeps the hospitals as a list, whose positions Distances indexes, and
+    as the space's set, which get_neighbors checks, along with the best
+    placement found.
+    """
+
+    def __init__(self, space, rng):
+        self.space = space
+        self.rng = rng
+        self.hospitals = space.random_hospitals(rng)
+        space.hospitals = set(self.hospitals)
+        self.distances = Distances(space.house_array(), self.hospitals,
+                                   space.height + space.width)
+        self.best = list(self.hospitals)
+        self.best_cost = self.distances.cost
+
+    def random_move(self):
+        """Returns a random hospital index and a free cell next to it.
+
+        The cell is None when the hospital has nowhere to go.
+        """
+        index = self.rng.randrange(len(self.hospitals))
+        neighbors = self.space.get_neighbors(*self.hospitals[index])
+        if not neighbors:
+            return index, None
+        return index, self.rng.choice(neighbors)
+
+    def move(self, index, replacement):
+        self.space.hospitals.remove(self.hospitals[index])
+        self.space.hospitals.add(replacement)
+        self.hospitals[index] = replacement
+        self.distances.move(index, replacement)
+        if self.distances.cost < self.best_cost:
+            self.best_cost = self.distances.cost
+            self.best = list(self.hospitals)
+
+
+# Space each worker process receives once, see start_worker
+worker = {}
+
+
+def start_worker(space):
+    """Stores a copy of the space in the worker process."""
+    worker["space"] = space
+
+
+def run_restart(task):
+    """Runs restart i of a parallel_restart, given (seed, i)."""
+    seed, i = task
+    space = worker["space"]
+    start = time.perf_counter()
+    hospitals = space.hill_climb(rng=random.Random(f"{seed}:{i}"))
+    return hospitals, space.get_cost(hospitals), time.perf_counter() - start
+
+
+class Distances():
+    """Each house's distances to its nearest and second-nearest hospital.
+
+    Moving one hospital changes a house's distance to the nearer of its new
+    position and the closest hospital that stays put: the second-nearest
+    if the moved hospital was its nearest, otherwise the nearest. So a move
+    is scored in O(houses) without recomputing every distance, and making
+    it only compares every hospital for the few houses it moves away from.
+    """
+
+    def __init__(self, houses, hospitals, far):
+        self.houses = houses
+        self.rows = np.ascontiguousarray(houses[:, 0])
+        self.columns = np.ascontiguousarray(houses[:, 1])
+        self.hospitals = np.array(hospitals, dtype=np.int64).reshape(-1, 2)
+        self.far = far
+
+        # Distances to the last cell scored, which move usually reuses
+        self.scored = None
+        self.nearest = np.empty(len(houses), dtype=np.intp)
+        self.runner = np.empty(len(houses), dtype=np.intp)
+        self.first = np.empty(len(houses), dtype=np.int64)
+        self.second = np.empty(len(houses), dtype=np.int64)
+        self.update(np.arange(len(houses)))
+
+    def update(self, rows):
+        """Recomputes the nearest two hospitals of the houses in rows."""
+        houses = self.houses[rows]
+        distances = (
+            np.abs(houses[:, np.newaxis, 0] - self.hospitals[np.newaxis, :, 0])
+            + np.abs(houses[:, np.newaxis, 1]
+                     - self.hospitals[np.newaxis, :, 1])
+        )
 
-# Use local search to determine hospital placement
-hospitals = s.random_restart(20,image_prefix="hospitals", log=True)  #random restart algorithm
-# hospitals = s.hill_climb(image_prefix="hospitals", log=True)
+        # With one hospital there is no second-nearest; far exceeds any
+        # distance on the grid
+        distances = np.concatenate(
+            [distances, np.full((len(houses), 1), self.far)], axis=1
+        )
+        indices = np.arange(len(houses))
+        nearest = np.argmin(distances, axis=1)
+        first = distances[indices, nearest]
+        distances[indices, nearest] = self.far + 1
+        runner = np.argmin(distances, axis=1)
+        self.nearest[rows] = nearest
+        self.runner[rows] = runner
+        self.first[rows] = first
+        self.second[rows] = distances[indices, runner]
+        self.cost = int(self.first.sum())
+
+    def distances_to(self, cell):
+        if self.scored is None or self.scored[0] != cell:
+            self.scored = (cell, np.abs(self.rows - cell[0])
+                           + np.abs(self.columns - cell[1]))
+        return self.scored[1]
+
+    def cost_after_move(self, index, replacement):
+        """Returns the cost once hospital number index moves to replacement."""
+        moved = self.distances_to(replacement)
+        others = np.where(self.nearest == index, self.second, self.first)
+        return int(np.minimum(moved, others).sum())
+
+    def move(self, index, replacement):
+        """Moves hospital number index to replacement."""
+        moved = self.distances_to(replacement)
+        self.hospitals[index] = replacement
+
+        # Houses it is now nearer to than their second-nearest keep their
+        # other hospitals in order, so it just takes its place among them
+        within = moved <= self.second
+        stays = within & (self.nearest == index)
+        closer = (moved < self.first) & ~stays
+        between = within & ~closer & ~stays
+        recompute = ~within & ((self.nearest == index)
+                               | (self.runner == index))
+        self.first[stays] = moved[stays]
+        self.runner[closer] = self.nearest[closer]
+        self.second[closer] = self.first[closer]
+        self.nearest[closer] = index
+        self.first[closer] = moved[closer]
+        self.runner[between] = index
+        self.second[between] = moved[between]
+
+        # Houses it moved away from past their second-nearest compare all
+        self.update(np.flatnonzero(recompute))
+
+
+def exponential_schedule(start, decay, minimum=0.01):
+    """Returns a schedule cooling from start by decay each step.
+
+    The temperature drops to 0, ending the search, once below minimum.
+    """
+    def schedule(step):
+        temperature = start * decay ** step
+        return temperature if temperature >= minimum else 0
+    return schedule
+
+
+if __name__ == "__main__":
+
+    # Create a new space and add houses randomly
+    s = Space(height=10, width=20, num_hospitals=3)
+    for i in range(15):
+        s.add_house(random.randrange(s.height), random.randrange(s.width))
+
+    # Use local search to determine hospital placement
+    hospitals = s.random_restart(20,image_prefix="hospitals", log=True)  #random restart algorithm
+    # hospitals = s.hill_climb(image_prefix="hospitals", log=True)